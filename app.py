@@ -6,22 +6,19 @@ App Streamlit multi-funzione per la gestione delle spedizioni.
 import io
 import csv
 import re
+import hashlib
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, date, time, timedelta
 
 import streamlit as st
-import pandas as pd
 
-from src.pdf_processor import PDFProcessor
-from src.excel_parser import ExcelParser, ExcelParserError
-from src.matcher import Matcher, UnmatchedReason, MatchType
-from src.sorter import Sorter, SortMethod
-from src.zip_validator import ZipValidator, ValidationReport
+# Feature modules (pandas, PyMuPDF, openpyxl, requests) are imported inside the
+# functions that need them, so first paint doesn't pay for them.
 from src.address_book import (
-    load_addresses, save_addresses, get_address_by_id, get_default_address,
+    load_addresses, save_addresses,
     add_address, update_address, delete_address, set_default_address,
-    get_address_display_name, get_address_summary, Address, is_sheets_configured
+    Address, is_sheets_configured
 )
 from src.logging_config import setup_logging, get_streamlit_handler, DEBUG, INFO
 from src.security import (
@@ -46,27 +43,43 @@ if 'logging_initialized' not in st.session_state:
 MAX_FILE_SIZE_MB = 50  # Maximum file size in MB
 MAX_PDF_PAGES = 500    # Maximum pages in PDF
 MAX_EXCEL_ROWS = 1000  # Maximum rows in Excel for ZIP validation
+MAX_ADDRESS_OPTIONS = 50  # Maximum addresses rendered in the pickup dropdown
+MAX_ADDRESS_ROWS_WITH_ACTIONS = 20  # Above this, the address book uses a single action row
 # Note: API rate limits are now handled by src/security.py with persistent storage
 
+# Seconds parsed uploads stay in the cross-session cache
+UPLOAD_CACHE_TTL = 15 * 60
 
-def check_file_size(file, max_mb: int = MAX_FILE_SIZE_MB) -> bool:
-    """Check if uploaded file exceeds size limit."""
-    if file is None:
-        return True
-    file.seek(0, 2)  # Seek to end
-    size_mb = file.tell() / (1024 * 1024)
-    file.seek(0)  # Reset to beginning
-    return size_mb <= max_mb
+# Timestamp suffix of downloaded files (e.g. 20250131_142500)
+DOWNLOAD_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Header row of the unmatched-labels CSV report
+CSV_REPORT_HEADER = ("Pagina Originale", "Tracking Estratto", "Corriere", "Motivo")
+
+_CAP_RE = re.compile(r"\d{5}")
+
+
+def _valid_cap(value: str) -> bool:
+    """Check that an Italian CAP is exactly 5 digits."""
+    return _CAP_RE.fullmatch(value) is not None
 
 
 def get_file_size_mb(file) -> float:
     """Get file size in MB."""
     if file is None:
         return 0
-    file.seek(0, 2)
-    size_mb = file.tell() / (1024 * 1024)
-    file.seek(0)
-    return size_mb
+    # Streamlit's UploadedFile knows its size; seek/tell only for other file objects
+    size = getattr(file, 'size', None)
+    if size is None:
+        file.seek(0, 2)
+        size = file.tell()
+        file.seek(0)
+    return size / (1024 * 1024)
+
+
+def check_file_size(file, max_mb: int = MAX_FILE_SIZE_MB) -> bool:
+    """Check if uploaded file exceeds size limit."""
+    return get_file_size_mb(file) <= max_mb
 
 
 def check_daily_api_limit(rows_to_validate: int) -> tuple[bool, str]:
@@ -129,30 +142,134 @@ def generate_csv_report(match_report, sorted_result) -> str:
     output = io.StringIO()
     writer = csv.writer(output)
 
-    writer.writerow([
-        "Pagina Originale",
-        "Tracking Estratto",
-        "Corriere",
-        "Motivo"
-    ])
-
-    for result in match_report.unmatched:
-        tracking = result.tracking if result.tracking else "(non estratto)"
-        carrier = result.carrier if result.carrier else "-"
-        reason = result.unmatched_reason.value if result.unmatched_reason else "Sconosciuto"
+    writer.writerow(CSV_REPORT_HEADER)
 
-        writer.writerow([
+    # Tutte le righe in una sola chiamata: il loop gira dentro il writer
+    writer.writerows(
+        (
             result.page_number,
-            tracking,
-            carrier,
-            reason
-        ])
+            result.tracking or "(non estratto)",
+            result.carrier or "-",
+            result.unmatched_reason.value if result.unmatched_reason else "Sconosciuto",
+        )
+        for result in match_report.unmatched
+    )
 
     return output.getvalue()
 
 
+def _content_digest(data: bytes) -> str:
+    """Digest veloce del contenuto di un file, usato come chiave di cache."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _upload_digest(uploaded_files: list, data: bytes) -> str:
+    """
+    _content_digest memorizzato in session_state per file_id.
+
+    Args:
+        uploaded_files: File caricati da cui provengono i dati
+        data: Contenuto dei file (hashato solo la prima volta)
+
+    Returns:
+        Digest esadecimale del contenuto
+    """
+    key = "upload_digest:" + ",".join(f.file_id for f in uploaded_files)
+    if key not in st.session_state:
+        st.session_state[key] = _content_digest(data)
+    return st.session_state[key]
+
+
+@st.cache_resource(show_spinner=False)
+def _pdf_processor():
+    """PDFProcessor condiviso: non ha stato, basta un'istanza per processo."""
+    from src.pdf_processor import PDFProcessor
+    return PDFProcessor()
+
+
+@st.cache_resource(show_spinner=False)
+def _excel_parser():
+    """ExcelParser condiviso: non ha stato, basta un'istanza per processo."""
+    from src.excel_parser import ExcelParser
+    return ExcelParser()
+
+
+@st.cache_data(max_entries=4, ttl=UPLOAD_CACHE_TTL, show_spinner=False)
+def _cached_pdf_pages(pdf_digest: str, _pdf_bytes: bytes) -> list:
+    """
+    Pagine estratte da PDFProcessor.process_pdf, con cache sul digest del contenuto.
+
+    La cache è condivisa tra le sessioni: contiene solo le pagine, non i
+    bytes del PDF caricato.
+
+    Args:
+        pdf_digest: Digest di _pdf_bytes (chiave di cache)
+        _pdf_bytes: PDF come bytes (escluso dall'hashing di Streamlit)
+
+    Returns:
+        Lista di PageInfo
+    """
+    return _pdf_processor().process_pdf(_pdf_bytes).pages
+
+
+def _cached_process_pdf(pdf_digest: str, pdf_bytes: bytes):
+    """
+    PDFProcessor.process_pdf con le pagine prese dalla cache.
+
+    Args:
+        pdf_digest: Digest di pdf_bytes (chiave di cache)
+        pdf_bytes: PDF come bytes
+
+    Returns:
+        PDFData estratto
+    """
+    from src.pdf_processor import PDFData
+    pages = _cached_pdf_pages(pdf_digest, pdf_bytes)
+    return PDFData(pages=pages, total_pages=len(pages), pdf_bytes=pdf_bytes)
+
+
+@st.cache_data(max_entries=4, ttl=UPLOAD_CACHE_TTL, show_spinner=False)
+def _cached_parse_excel(excel_digest: str, filename: str, _excel_bytes: bytes):
+    """
+    ExcelParser.parse_excel con cache sul digest del contenuto.
+
+    Args:
+        excel_digest: Digest di _excel_bytes (chiave di cache)
+        filename: Nome del file
+        _excel_bytes: File Excel come bytes (escluso dall'hashing di Streamlit)
+
+    Returns:
+        ExcelData estratto
+    """
+    return _excel_parser().parse_excel(_excel_bytes, filename)
+
+
+@st.cache_data(max_entries=4, ttl=UPLOAD_CACHE_TTL, show_spinner=False)
+def _cached_match(pdf_digest: str, excel_digest: str, _pdf_data, _excel_data):
+    """
+    Matcher.match_all con cache sui digest dei due file.
+
+    Il risultato non dipende dal metodo di ordinamento: cambiarlo rifà
+    solo l'ordinamento.
+
+    Args:
+        pdf_digest: Digest del PDF (chiave di cache)
+        excel_digest: Digest dell'Excel (chiave di cache)
+        _pdf_data: PDFData estratto (escluso dall'hashing di Streamlit)
+        _excel_data: ExcelData estratto (escluso dall'hashing di Streamlit)
+
+    Returns:
+        MatchReport
+    """
+    from src.matcher import Matcher
+    return Matcher(_pdf_data, _excel_data).match_all()
+
+
 def label_sorter_page():
     """Page for Label Sorter feature."""
+    from src.excel_parser import ExcelParserError
+    from src.matcher import MatchType
+    from src.sorter import Sorter, SortMethod
 
     # Initialize session state for persisting results
     if 'label_sorter_results' not in st.session_state:
@@ -239,17 +356,19 @@ def label_sorter_page():
     # ── Step 2: Sort method (visible after files uploaded) ───────────────
     files_uploaded = bool(pdf_files) and bool(excel_file)
 
+    sort_labels = {
+        SortMethod.EXCEL_ORDER: "Segui ordine Excel",
+        SortMethod.ORDER_ID_NUMERIC: "Ordina per Order ID (numerico crescente)",
+    }
+
     if files_uploaded and not has_results:
         st.markdown(f'<div style="height:0.5rem;"></div>', unsafe_allow_html=True)
         _section_header("Metodo di ordinamento")
 
         sort_method = st.radio(
             "Seleziona come ordinare le etichette:",
-            options=[
-                ("Segui ordine Excel", SortMethod.EXCEL_ORDER),
-                ("Ordina per Order ID (numerico crescente)", SortMethod.ORDER_ID_NUMERIC)
-            ],
-            format_func=lambda x: x[0],
+            options=list(sort_labels),
+            format_func=sort_labels.get,
             horizontal=True,
             index=1,
             key="sort_method",
@@ -266,7 +385,7 @@ def label_sorter_page():
         )
     else:
         # Need a sort_method default even if section is hidden
-        sort_method = ("Ordina per Order ID (numerico crescente)", SortMethod.ORDER_ID_NUMERIC)
+        sort_method = SortMethod.ORDER_ID_NUMERIC
         process_button = False
 
     # ── Step 3: Processing ───────────────────────────────────────────────
@@ -287,66 +406,69 @@ def label_sorter_page():
 
         status_container = st.container()
 
+        # L'Excel viene letto in un thread mentre lo Step 1 elabora il PDF
+        excel_bytes = excel_file.getvalue()
+        excel_digest = _upload_digest([excel_file], excel_bytes)
+        excel_executor = ThreadPoolExecutor(max_workers=1)
+        excel_future = excel_executor.submit(_cached_parse_excel, excel_digest, excel_file.name, excel_bytes)
+
         with status_container:
             try:
-                pdf_processor = PDFProcessor()
-                excel_parser = ExcelParser()
+                pdf_processor = _pdf_processor()
 
                 # Step 1: Leggi e unisci PDF
                 with st.status(f"Step 1/5: Lettura {len(pdf_files)} PDF...", expanded=True) as status:
                     import fitz  # PyMuPDF for merging
 
+                    # Dettagli raccolti e scritti una volta sola per step
                     if len(pdf_files) == 1:
-                        st.write("Caricamento file PDF...")
-                        pdf_bytes = pdf_files[0].read()
-                        st.write(f"File caricato: {len(pdf_bytes):,} bytes")
+                        pdf_bytes = pdf_files[0].getvalue()
+                        lines = [f"File caricato: {pdf_files[0].size:,} bytes"]
                     else:
-                        st.write(f"Unione di {len(pdf_files)} file PDF...")
+                        lines = [f"Unione di {len(pdf_files)} file PDF:"]
                         merged_doc = fitz.open()
-                        for i, pdf_file in enumerate(pdf_files):
-                            pdf_file.seek(0)
-                            file_bytes = pdf_file.read()
-                            st.write(f"  {pdf_file.name}: {len(file_bytes):,} bytes")
-                            temp_doc = fitz.open(stream=file_bytes, filetype="pdf")
+                        for pdf_file in pdf_files:
+                            lines.append(f"{pdf_file.name}: {pdf_file.size:,} bytes")
+                            temp_doc = fitz.open(stream=pdf_file.getvalue(), filetype="pdf")
                             merged_doc.insert_pdf(temp_doc)
                             temp_doc.close()
                         pdf_bytes = merged_doc.tobytes()
                         merged_doc.close()
-                        st.write(f"PDF unito: {len(pdf_bytes):,} bytes totali")
+                        lines.append(f"PDF unito: {len(pdf_bytes):,} bytes totali")
 
-                    st.write("Estrazione pagine e tracking...")
-                    pdf_data = pdf_processor.process_pdf(pdf_bytes)
-                    st.write(f"Pagine trovate: {pdf_data.total_pages}")
+                    pdf_digest = _upload_digest(pdf_files, pdf_bytes)
+                    pdf_data = _cached_process_pdf(pdf_digest, pdf_bytes)
+                    lines.append(f"Pagine trovate: {pdf_data.total_pages}")
+
+                    extracted = [(p.page_number, p.tracking, p.carrier) for p in pdf_data.pages[:5] if p.tracking]
+                    if extracted:
+                        lines.append(f"Primi tracking estratti: {extracted}")
+                    st.markdown("  \n".join(lines))
 
                     # Security check: page limit
                     if pdf_data.total_pages > MAX_PDF_PAGES:
                         st.error(f"Troppe pagine nel PDF ({pdf_data.total_pages}). Massimo: {MAX_PDF_PAGES}")
                         st.stop()
 
-                    extracted = [(p.page_number, p.tracking, p.carrier) for p in pdf_data.pages[:5] if p.tracking]
-                    if extracted:
-                        st.write(f"Primi tracking estratti: {extracted}")
-                    else:
+                    if not extracted:
                         st.warning("Nessun tracking estratto dalle prime pagine")
 
                     status.update(label=f"Step 1/5: PDF letto ({pdf_data.total_pages} pagine)", state="complete")
 
                 # Step 2: Leggi Excel
                 with st.status("Step 2/5: Lettura Excel...", expanded=True) as status:
-                    st.write("Caricamento file Excel...")
-                    excel_bytes = excel_file.read()
-                    st.write(f"File caricato: {len(excel_bytes):,} bytes")
-
-                    st.write("Parsing dati ordini...")
                     try:
-                        excel_data = excel_parser.parse_excel(excel_bytes, excel_file.name)
-                        st.write(f"Ordini trovati: {len(excel_data.orders)}")
-                        st.write(f"Colonne trovate: {excel_data.columns_found}")
-                        st.write(f"Colonna Tracking usata: **{excel_data.tracking_column_used}**")
-
+                        excel_data = excel_future.result()
+                        lines = [
+                            f"File caricato: {excel_file.size:,} bytes",
+                            f"Ordini trovati: {len(excel_data.orders)}",
+                            f"Colonne trovate: {excel_data.columns_found}",
+                            f"Colonna Tracking usata: **{excel_data.tracking_column_used}**",
+                        ]
                         if excel_data.orders:
                             first_orders = [(o.order_id, o.tracking) for o in excel_data.orders[:3]]
-                            st.write(f"Primi ordini (ID, Tracking): {first_orders}")
+                            lines.append(f"Primi ordini (ID, Tracking): {first_orders}")
+                        st.markdown("  \n".join(lines))
 
                         status.update(label=f"Step 2/5: Excel letto ({len(excel_data.orders)} ordini)", state="complete")
                     except ExcelParserError as e:
@@ -361,44 +483,50 @@ def label_sorter_page():
 
                 # Step 3: Matching
                 with st.status("Step 3/5: Matching tracking...", expanded=True) as status:
-                    st.write("Creazione indice tracking Excel...")
-                    matcher = Matcher(pdf_data, excel_data)
-                    st.write(f"Indice creato con {len(excel_data.orders)} tracking")
-
-                    st.write("Matching pagine PDF con ordini Excel...")
-                    match_report = matcher.match_all()
-                    st.write(f"Matchate: {len(match_report.matched)} / {match_report.total_pages}")
-                    st.write(f"Non matchate: {len(match_report.unmatched)}")
-                    st.write(f"Match rate: {match_report.match_rate}%")
+                    match_report = _cached_match(pdf_digest, excel_digest, pdf_data, excel_data)
+                    st.markdown("  \n".join([
+                        f"Matchate: {len(match_report.matched)} / {match_report.total_pages}",
+                        f"Non matchate: {len(match_report.unmatched)}",
+                        f"Match rate: {match_report.match_rate}%",
+                    ]))
 
                     status.update(label=f"Step 3/5: Matching completato ({match_report.match_rate}%)", state="complete")
 
                 # Step 4: Ordinamento
                 with st.status("Step 4/5: Ordinamento pagine...", expanded=True) as status:
-                    st.write(f"Metodo: {sort_method[0]}")
                     sorter = Sorter(match_report, excel_data)
-                    sorted_result = sorter.sort(sort_method[1])
-                    st.write(f"Ordine calcolato per {len(sorted_result.page_order)} pagine")
-                    st.write(f"Prime pagine nell'ordine: {sorted_result.page_order[:10]}...")
+                    sorted_result = sorter.sort(sort_method)
+                    st.markdown("  \n".join([
+                        f"Metodo: {sort_labels[sort_method]}",
+                        f"Ordine calcolato per {len(sorted_result.page_order)} pagine",
+                        f"Prime pagine nell'ordine: {sorted_result.page_order[:10]}...",
+                    ]))
 
                     status.update(label="Step 4/5: Ordinamento completato", state="complete")
 
                 # Step 5: Genera PDF riordinato
                 with st.status("Step 5/5: Generazione PDF...", expanded=True) as status:
-                    st.write(f"Riordinamento {len(sorted_result.page_order)} pagine...")
-                    st.write("Questo potrebbe richiedere alcuni secondi per PDF grandi...")
-
-                    reordered_pdf = pdf_processor.reorder_pdf(
-                        pdf_bytes,
-                        sorted_result.page_order
-                    )
+                    st.write(f"Riordinamento {len(sorted_result.page_order)} pagine, potrebbe richiedere alcuni secondi per PDF grandi...")
+
+                    # Riordino in un thread: lo script resta libero di aggiornare lo status
+                    reorder_start = datetime.now()
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        reorder_future = executor.submit(
+                            pdf_processor.reorder_pdf,
+                            pdf_bytes,
+                            sorted_result.page_order
+                        )
+                        while not wait([reorder_future], timeout=0.5).done:
+                            elapsed = int((datetime.now() - reorder_start).total_seconds())
+                            status.update(label=f"Step 5/5: Generazione PDF... ({elapsed}s)")
+                        reordered_pdf = reorder_future.result()
 
                     st.write(f"PDF generato: {len(reordered_pdf):,} bytes")
                     status.update(label=f"Step 5/5: PDF generato ({len(reordered_pdf):,} bytes)", state="complete")
 
                 # Generate CSV report and store results in session state
                 csv_report = generate_csv_report(match_report, sorted_result)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                timestamp = datetime.now().strftime(DOWNLOAD_TIMESTAMP_FORMAT)
 
                 st.session_state.label_sorter_results = {
                     'reordered_pdf': reordered_pdf,
@@ -413,10 +541,12 @@ def label_sorter_page():
                 st.error(f"Errore durante l'elaborazione: {str(e)}")
                 st.exception(e)
                 st.stop()
+            finally:
+                excel_executor.shutdown(wait=False, cancel_futures=True)
 
     # ── Step 4: Display results (persists across reruns) ─────────────────
-    if st.session_state.label_sorter_results:
-        results = st.session_state.label_sorter_results
+    results = st.session_state.label_sorter_results
+    if results:
         match_report = results['match_report']
         sorted_result = results['sorted_result']
         pdf_data = results['pdf_data']
@@ -466,14 +596,22 @@ def label_sorter_page():
             with st.expander(f"Mostra dettagli — {unmatched_count} etichette non matchate", expanded=False):
                 st.caption("Queste etichette sono state inserite in fondo al PDF")
 
-                unmatched_data = []
-                for result in match_report.unmatched:
-                    unmatched_data.append({
-                        "Pag.": result.page_number,
-                        "Tracking estratto": result.tracking if result.tracking else "(non riconosciuto)",
-                        "Corriere": result.carrier if result.carrier else "-",
-                        "Motivo": result.unmatched_reason.value if result.unmatched_reason else "Sconosciuto"
-                    })
+                # Colonne costruite in un solo passaggio (niente dict per riga)
+                pages, trackings, carriers, reasons = zip(*(
+                    (
+                        result.page_number,
+                        result.tracking if result.tracking else "(non riconosciuto)",
+                        result.carrier if result.carrier else "-",
+                        result.unmatched_reason.value if result.unmatched_reason else "Sconosciuto",
+                    )
+                    for result in match_report.unmatched
+                ))
+                unmatched_data = {
+                    "Pag.": pages,
+                    "Tracking estratto": trackings,
+                    "Corriere": carriers,
+                    "Motivo": reasons,
+                }
 
                 st.dataframe(unmatched_data, use_container_width=True, hide_index=True)
         else:
@@ -537,6 +675,8 @@ def label_sorter_page():
 
 def zip_validator_page():
     """Page for Address Validator feature."""
+    import pandas as pd
+    from src.zip_validator import ZipValidator
 
     # Initialize session state for persisting results
     if 'zip_validation_results' not in st.session_state:
@@ -682,23 +822,20 @@ def zip_validator_page():
         try:
             # Read Excel
             with st.status("Lettura file...", expanded=True) as status:
-                excel_bytes = excel_file.read()
-                st.write(f"File caricato: {len(excel_bytes):,} bytes")
-
-                # Try to read with pandas - store working engine for consistency
-                excel_engine = None
-                try:
-                    df = pd.read_excel(io.BytesIO(excel_bytes), engine='openpyxl')
-                    excel_engine = 'openpyxl'
-                except:
-                    try:
-                        df = pd.read_excel(io.BytesIO(excel_bytes), engine='calamine')
-                        excel_engine = 'calamine'
-                    except:
-                        df = pd.read_excel(io.BytesIO(excel_bytes))
+                excel_bytes = excel_file.getvalue()
+                st.write(f"File caricato: {excel_file.size:,} bytes")
 
-                # Store original df before any filtering
-                original_df = df.copy()
+                # Rust-backed calamine first (fastest for read-only ingestion),
+                # openpyxl as fallback
+                df = None
+                for engine in ('calamine', 'openpyxl'):
+                    try:
+                        df = pd.read_excel(io.BytesIO(excel_bytes), engine=engine)
+                        break
+                    except Exception:
+                        continue
+                if df is None:
+                    df = pd.read_excel(io.BytesIO(excel_bytes))
 
                 # Security check: validate Excel content for malicious formulas
                 content_valid, content_error = validate_excel_content(df)
@@ -757,9 +894,16 @@ def zip_validator_page():
             progress_bar = st.progress(0)
             status_text = st.empty()
             validation_start = datetime.now()
+            last_percent = -1
 
             def update_progress(current, total, message):
+                nonlocal last_percent
                 pct = min(current / total, 1.0) if total > 0 else 0
+                # One update per percentage point: the callback fires per address
+                percent = int(pct * 100)
+                if percent == last_percent:
+                    return
+                last_percent = percent
                 progress_bar.progress(pct)
                 # Estimate time remaining for validation phase
                 if current > 20 and total > 0:
@@ -780,7 +924,7 @@ def zip_validator_page():
             # Generate files using preprocessed DataFrame (with C.C. moved to Street 2)
             corrected_excel = validator.generate_corrected_excel(preprocessed_df, report)
             review_excel = validator.generate_review_report(report)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = datetime.now().strftime(DOWNLOAD_TIMESTAMP_FORMAT)
 
             st.session_state.zip_validation_results = {
                 'report': report,
@@ -1003,6 +1147,32 @@ def zip_validator_page():
             st.rerun()
 
 
+FREIGHT_WEIGHT_KG = 70  # Total weight above which a pickup is classified FREIGHT
+
+
+def compute_shipment_totals(num_packages: int, weight_per_package: float) -> tuple[float, str]:
+    """
+    Compute total weight and shipment type for a pickup.
+
+    Returns:
+        Tuple of (total_weight, shipment_type) where shipment_type is "FREIGHT" or "NORMAL"
+    """
+    total_weight = num_packages * weight_per_package
+    shipment_type = "FREIGHT" if total_weight > FREIGHT_WEIGHT_KG else "NORMAL"
+    return total_weight, shipment_type
+
+
+@st.cache_resource(show_spinner=False)
+def _zapier_session() -> "requests.Session":
+    """Shared HTTP session so repeated pickup requests reuse the Zapier connection."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
 def send_pickup_request(
     carrier: str,
     pickup_date: date,
@@ -1033,9 +1203,10 @@ def send_pickup_request(
     Returns:
         Tuple of (success, message)
     """
+    import requests
+
     # Calculate totals
-    total_weight = num_packages * weight_per_package
-    shipment_type = "FREIGHT" if total_weight > 70 else "NORMAL"
+    total_weight, shipment_type = compute_shipment_totals(num_packages, weight_per_package)
     package_volume = length * width * height / 1000000  # in cubic meters
     total_volume = package_volume * num_packages
 
@@ -1121,7 +1292,7 @@ def send_pickup_request(
             return False, "Configurazione Zapier mancante. Aggiungi ZAPIER_WEBHOOK_URL nelle variabili d'ambiente."
 
         # Send POST request to Zapier
-        response = requests.post(
+        response = _zapier_session().post(
             webhook_url,
             json=payload,
             timeout=10
@@ -1172,7 +1343,7 @@ def address_book_management():
                     if st.form_submit_button("Salva", use_container_width=True):
                         if not new_name or not new_company or not new_street or not new_zip or not new_city:
                             st.error("Compila tutti i campi obbligatori")
-                        elif not new_zip.isdigit() or len(new_zip) != 5:
+                        elif not _valid_cap(new_zip):
                             st.error("CAP deve essere di 5 cifre")
                         else:
                             result = add_address(
@@ -1202,32 +1373,52 @@ def address_book_management():
                 st.rerun()
 
         # List existing addresses — compact
-        if addresses:
-            for addr in addresses:
-                col_info, col_actions = st.columns([4, 1])
-                with col_info:
-                    prefix = "⭐" if addr.is_default else "📍"
-                    sec_color = COLORS["text_secondary"]
-                    prov_str = f" ({addr.province})" if addr.province else ""
-                    st.markdown(
-                        f"**{prefix} {addr.name}** — {addr.company}  \n"
-                        f"<small style='color:{sec_color}'>"
-                        f"{addr.street}, {addr.zip} {addr.city}{prov_str}"
-                        f"</small>",
-                        unsafe_allow_html=True
-                    )
-                with col_actions:
-                    btn_cols = st.columns(2)
-                    with btn_cols[0]:
-                        if not addr.is_default:
-                            if st.button("⭐", key=f"default_{addr.id}", help="Imposta predefinito"):
-                                set_default_address(addr.id)
-                                st.rerun()
-                    with btn_cols[1]:
-                        if len(addresses) > 1:
-                            if st.button("🗑️", key=f"delete_{addr.id}", help="Elimina"):
-                                delete_address(addr.id)
-                                st.rerun()
+        if not addresses:
+            return
+
+        sec_color = COLORS["text_secondary"]
+
+        def _address_line(addr: Address) -> str:
+            prefix = "⭐" if addr.is_default else "📍"
+            return (
+                f"**{prefix} {addr.name}** — {addr.company}  \n"
+                f"<small style='color:{sec_color}'>{addr.summary}</small>"
+            )
+
+        if len(addresses) > MAX_ADDRESS_ROWS_WITH_ACTIONS:
+            # Large books: one markdown block for the list + a single action row,
+            # instead of columns and buttons for every address
+            st.markdown("\n\n".join(_address_line(addr) for addr in addresses), unsafe_allow_html=True)
+
+            addr_by_name = {addr.name: addr for addr in addresses}
+            target = addr_by_name[st.selectbox("Indirizzo", options=list(addr_by_name), key="address_book_target")]
+            col_default, col_delete = st.columns(2)
+            with col_default:
+                if st.button("⭐ Predefinito", key="default_selected", disabled=target.is_default, use_container_width=True):
+                    set_default_address(target.id)
+                    st.rerun()
+            with col_delete:
+                if st.button("🗑️ Elimina", key="delete_selected", use_container_width=True):
+                    delete_address(target.id)
+                    st.rerun()
+            return
+
+        for addr in addresses:
+            col_info, col_actions = st.columns([4, 1])
+            with col_info:
+                st.markdown(_address_line(addr), unsafe_allow_html=True)
+            with col_actions:
+                btn_cols = st.columns(2)
+                with btn_cols[0]:
+                    if not addr.is_default:
+                        if st.button("⭐", key=f"default_{addr.id}", help="Imposta predefinito"):
+                            set_default_address(addr.id)
+                            st.rerun()
+                with btn_cols[1]:
+                    if len(addresses) > 1:
+                        if st.button("🗑️", key=f"delete_{addr.id}", help="Elimina"):
+                            delete_address(addr.id)
+                            st.rerun()
 
 
 def _section_header(title: str) -> None:
@@ -1277,11 +1468,15 @@ def pickup_request_page():
             "Configura le credenziali in Streamlit Secrets per salvare gli indirizzi."
         )
 
+    # Load the address book once per full rerun; the default address is
+    # derived from it instead of a separate query
+    addresses = load_addresses()
+
     # Initialize session state
     if 'pickup_request_sent' not in st.session_state:
         st.session_state.pickup_request_sent = False
     if 'selected_address_id' not in st.session_state:
-        default_addr = get_default_address()
+        default_addr = next((addr for addr in addresses if addr.is_default), None)
         st.session_state.selected_address_id = default_addr.id if default_addr else None
     if 'selected_carrier' not in st.session_state:
         st.session_state.selected_carrier = "FedEx"
@@ -1297,7 +1492,26 @@ def pickup_request_page():
             st.rerun()
         return
 
-    # ── CARD 1: Carrier + Date/Time ──────────────────────────────────────
+    # Each card is an independent fragment: interacting with a widget only
+    # reruns its own card. Values are shared through st.session_state.
+    _pickup_schedule_section()
+    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
+
+    _pickup_address_section(addresses)
+    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
+
+    _pickup_packages_section()
+    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
+
+    _pickup_notes_section()
+    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
+
+    _pickup_submit_form()
+
+
+@st.fragment
+def _pickup_schedule_section():
+    """CARD 1: carrier selection + pickup date/time window."""
     _section_header("Corriere e Data")
 
     col_carrier, col_datetime = st.columns([3, 2], gap="large")
@@ -1315,12 +1529,10 @@ def pickup_request_page():
                 btn_type = "primary" if is_selected else "secondary"
                 if st.button(c_name, key=f"carrier_{c_name}", use_container_width=True, type=btn_type):
                     st.session_state.selected_carrier = c_name
-                    st.rerun()
-
-    carrier = st.session_state.selected_carrier
+                    st.rerun(scope="fragment")
 
     with col_datetime:
-        pickup_date = st.date_input(
+        st.date_input(
             "Data ritiro",
             value=date.today() + timedelta(days=1),
             min_value=date.today(),
@@ -1328,51 +1540,70 @@ def pickup_request_page():
         )
         tc1, tc2 = st.columns(2)
         with tc1:
-            time_start = st.time_input("Dalle", value=time(9, 0), key="time_start")
+            st.time_input("Dalle", value=time(9, 0), key="time_start")
         with tc2:
-            time_end = st.time_input("Alle", value=time(18, 0), key="time_end")
+            st.time_input("Alle", value=time(18, 0), key="time_end")
 
-    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
 
-    # ── CARD 2: Address ──────────────────────────────────────────────────
-    _section_header("Indirizzo ritiro")
+@st.fragment
+def _pickup_address_section(addresses: list[Address]):
+    """CARD 2: address book selection or manual address entry.
 
-    # Address book popover + address selection
-    addresses = load_addresses()
+    Args:
+        addresses: Address book loaded by the page. Fragment reruns reuse
+            it; address book changes trigger a full rerun that reloads it.
+    """
+    _section_header("Indirizzo ritiro")
 
-    # Build address options for dropdown
-    address_options = {get_address_display_name(addr): addr.id for addr in addresses}
-    address_options["Nuovo indirizzo (inserimento manuale)"] = "new"
+    # Build lookup tables once per rerun (addresses are already loaded)
+    by_id = {addr.id: addr for addr in addresses}
+    display_names = [addr.display_name for addr in addresses]
+    display_names.append("Nuovo indirizzo (inserimento manuale)")
+    id_by_display = dict(zip(display_names, [addr.id for addr in addresses] + ["new"]))
+    display_by_id = {addr_id: name for name, addr_id in id_by_display.items()}
 
     # Get current selection
-    current_selection = None
-    for display_name, addr_id in address_options.items():
-        if addr_id == st.session_state.selected_address_id:
-            current_selection = display_name
-            break
-    if current_selection is None:
-        current_selection = list(address_options.keys())[0] if addresses else "Nuovo indirizzo (inserimento manuale)"
+    current_selection = display_by_id.get(st.session_state.selected_address_id, display_names[0])
 
     addr_header_col, addr_book_col = st.columns([3, 1])
     with addr_header_col:
+        # Large address books: filter by search and cap the dropdown size,
+        # always keeping the current selection and the manual-entry option
+        options = display_names
+        if len(addresses) > MAX_ADDRESS_OPTIONS:
+            query = st.text_input(
+                "Cerca indirizzo",
+                placeholder="Cerca indirizzo...",
+                key="addr_search",
+                label_visibility="collapsed",
+            ).strip().lower()
+            options = [name for name in display_names[:-1] if query in name.lower()][:MAX_ADDRESS_OPTIONS]
+            if current_selection not in options:
+                options.insert(0, current_selection)
+            if display_names[-1] not in options:
+                options.append(display_names[-1])
+
+        # The selectbox persists its own value under its key: seed it only on
+        # first load, or when the stored label is gone (renamed, default changed)
+        if st.session_state.get("address_selector") not in options:
+            st.session_state.address_selector = current_selection
+
         selected_display = st.selectbox(
             "Seleziona indirizzo",
-            options=list(address_options.keys()),
-            index=list(address_options.keys()).index(current_selection) if current_selection in address_options else 0,
+            options=options,
             key="address_selector",
             label_visibility="collapsed",
         )
     with addr_book_col:
         address_book_management()
 
-    selected_address_id = address_options[selected_display]
+    selected_address_id = id_by_display[selected_display]
     st.session_state.selected_address_id = selected_address_id
 
     # Get selected address data
-    selected_address = get_address_by_id(selected_address_id) if selected_address_id != "new" else None
-    is_from_book = selected_address is not None
+    selected_address = by_id.get(selected_address_id)
 
-    if is_from_book:
+    if selected_address is not None:
         # Compact address summary card
         company = selected_address.company
         contact_name = selected_address.contact_name
@@ -1385,7 +1616,7 @@ def pickup_request_page():
         addr_lines = [f"**{company}**"]
         if contact_name:
             addr_lines.append(f"Ref: {contact_name}")
-        addr_lines.append(f"{address}, {zip_code} {city}" + (f" ({province})" if province else ""))
+        addr_lines.append(selected_address.summary)
         if reference:
             addr_lines.append(f"Tel: {reference}")
 
@@ -1413,9 +1644,21 @@ def pickup_request_page():
 
         reference = st.text_input("Telefono", placeholder="02 1234567", key="reference")
 
-    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
+    # Resolved address for the submit form (runs outside this fragment)
+    st.session_state.pickup_address = {
+        "company": company,
+        "contact_name": contact_name or "",
+        "address": address,
+        "zip_code": zip_code,
+        "city": city,
+        "province": province or "",
+        "reference": reference or "",
+    }
 
-    # ── CARD 3: Package Details ──────────────────────────────────────────
+
+@st.fragment
+def _pickup_packages_section():
+    """CARD 3: package details, optional pallet, and the weight summary."""
     _section_header("Dettagli colli")
 
     col_packages, col_weight = st.columns(2)
@@ -1438,15 +1681,15 @@ def pickup_request_page():
     )
     dim_cols = st.columns([2, 0.3, 2, 0.3, 2])
     with dim_cols[0]:
-        length = st.number_input("L", min_value=0.0, value=0.0, step=1.0, key="length", label_visibility="collapsed")
+        st.number_input("L", min_value=0.0, value=0.0, step=1.0, key="length", label_visibility="collapsed")
     with dim_cols[1]:
         st.markdown(f'<p style="text-align:center;padding-top:0.5rem;color:{COLORS["text_muted"]};">x</p>', unsafe_allow_html=True)
     with dim_cols[2]:
-        width = st.number_input("W", min_value=0.0, value=0.0, step=1.0, key="width", label_visibility="collapsed")
+        st.number_input("W", min_value=0.0, value=0.0, step=1.0, key="width", label_visibility="collapsed")
     with dim_cols[3]:
         st.markdown(f'<p style="text-align:center;padding-top:0.5rem;color:{COLORS["text_muted"]};">x</p>', unsafe_allow_html=True)
     with dim_cols[4]:
-        height = st.number_input("H", min_value=0.0, value=0.0, step=1.0, key="height", label_visibility="collapsed")
+        st.number_input("H", min_value=0.0, value=0.0, step=1.0, key="height", label_visibility="collapsed")
 
     # Dimension labels below inputs
     lbl_cols = st.columns([2, 0.3, 2, 0.3, 2])
@@ -1461,9 +1704,6 @@ def pickup_request_page():
     use_pallet = st.toggle("Raggruppamento su pallet", key="use_pallet")
 
     num_pallets = 0
-    pallet_length = 0.0
-    pallet_width = 0.0
-    pallet_height = 0.0
 
     if use_pallet:
         num_pallets = st.number_input(
@@ -1476,15 +1716,15 @@ def pickup_request_page():
         )
         pal_cols = st.columns([2, 0.3, 2, 0.3, 2])
         with pal_cols[0]:
-            pallet_length = st.number_input("PL", min_value=0.0, value=120.0, step=1.0, key="pallet_length", label_visibility="collapsed")
+            st.number_input("PL", min_value=0.0, value=120.0, step=1.0, key="pallet_length", label_visibility="collapsed")
         with pal_cols[1]:
             st.markdown(f'<p style="text-align:center;padding-top:0.5rem;color:{COLORS["text_muted"]};">x</p>', unsafe_allow_html=True)
         with pal_cols[2]:
-            pallet_width = st.number_input("PW", min_value=0.0, value=80.0, step=1.0, key="pallet_width", label_visibility="collapsed")
+            st.number_input("PW", min_value=0.0, value=80.0, step=1.0, key="pallet_width", label_visibility="collapsed")
         with pal_cols[3]:
             st.markdown(f'<p style="text-align:center;padding-top:0.5rem;color:{COLORS["text_muted"]};">x</p>', unsafe_allow_html=True)
         with pal_cols[4]:
-            pallet_height = st.number_input("PH", min_value=0.0, value=0.0, step=1.0, key="pallet_height", label_visibility="collapsed")
+            st.number_input("PH", min_value=0.0, value=0.0, step=1.0, key="pallet_height", label_visibility="collapsed")
 
         plbl_cols = st.columns([2, 0.3, 2, 0.3, 2])
         with plbl_cols[0]:
@@ -1496,27 +1736,15 @@ def pickup_request_page():
 
     st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
 
-    # ── CARD 4 (optional): Notes ─────────────────────────────────────────
-    show_notes = st.toggle("+ Aggiungi note", key="show_notes")
-    notes = ""
-    if show_notes:
-        notes = st.text_area(
-            "Note per il corriere",
-            placeholder="Eventuali note aggiuntive...",
-            key="notes",
-        )
-
-    st.markdown(f'<div style="height:1rem;"></div>', unsafe_allow_html=True)
-
-    # ── Summary + Submit Bar ─────────────────────────────────────────────
-    total_weight = num_packages * weight_per_package
-    shipment_type = "FREIGHT" if total_weight > 70 else "NORMAL"
+    # ── Summary (depends only on this card's inputs) ─────────────────────
+    total_weight, shipment_type = compute_shipment_totals(num_packages, weight_per_package)
+    is_freight = shipment_type == "FREIGHT"
 
     summary_col, submit_col = st.columns([3, 1])
 
     with summary_col:
-        weight_color = COLORS["error"] if total_weight > 70 else COLORS["text_primary"]
-        type_badge_bg = COLORS["error"] if shipment_type == "FREIGHT" else COLORS["primary"]
+        weight_color = COLORS["error"] if is_freight else COLORS["text_primary"]
+        type_badge_bg = COLORS["error"] if is_freight else COLORS["primary"]
         st.markdown(
             f'<div style="display:flex;align-items:center;gap:1.5rem;padding:0.75rem 0;">'
             f'<span style="font-size:0.9rem;color:{COLORS["text_secondary"]};">Peso totale: '
@@ -1528,8 +1756,48 @@ def pickup_request_page():
             unsafe_allow_html=True,
         )
 
-    if total_weight > 70:
-        st.warning("Peso superiore a 70 kg — spedizione classificata FREIGHT")
+    if is_freight:
+        st.warning(f"Peso superiore a {FREIGHT_WEIGHT_KG} kg — spedizione classificata FREIGHT")
+
+
+@st.fragment
+def _pickup_notes_section():
+    """CARD 4 (optional): free-text notes for the courier."""
+    show_notes = st.toggle("+ Aggiungi note", key="show_notes")
+    if show_notes:
+        st.text_area(
+            "Note per il corriere",
+            placeholder="Eventuali note aggiuntive...",
+            key="notes",
+        )
+
+
+def _pickup_submit_form():
+    """Submit bar: validates the values collected by the card fragments and sends the request."""
+    ss = st.session_state
+    carrier = ss.selected_carrier
+    pickup_date = ss.pickup_date
+    time_start = ss.time_start
+    time_end = ss.time_end
+    addr = ss.get("pickup_address", {})
+    company = addr.get("company", "")
+    contact_name = addr.get("contact_name", "")
+    address = addr.get("address", "")
+    zip_code = addr.get("zip_code", "")
+    city = addr.get("city", "")
+    province = addr.get("province", "")
+    reference = addr.get("reference", "")
+    num_packages = ss.num_packages
+    weight_per_package = ss.weight_per_package
+    length = ss.length
+    width = ss.width
+    height = ss.height
+    use_pallet = ss.use_pallet
+    num_pallets = ss.get("num_pallets", 0) if use_pallet else 0
+    pallet_length = ss.get("pallet_length", 0.0) if use_pallet else 0.0
+    pallet_width = ss.get("pallet_width", 0.0) if use_pallet else 0.0
+    pallet_height = ss.get("pallet_height", 0.0) if use_pallet else 0.0
+    notes = ss.get("notes", "") if ss.show_notes else ""
 
     # Submit button in a form for proper submission handling
     with st.form("pickup_request_form"):
@@ -1540,39 +1808,23 @@ def pickup_request_page():
         )
 
         if submitted:
-            # Validation
-            errors = []
-
-            if not address:
-                errors.append("Indirizzo obbligatorio")
-
-            if not zip_code:
-                errors.append("CAP obbligatorio")
-            elif not zip_code.isdigit() or len(zip_code) != 5:
-                errors.append("CAP deve essere di 5 cifre")
-
-            if not city:
-                errors.append("Città obbligatoria")
-
-            if time_end <= time_start:
-                errors.append("Orario fine deve essere successivo all'orario inizio")
-
-            # Dimensions validation: all required
-            if length <= 0:
-                errors.append("Lunghezza collo obbligatoria")
-            if width <= 0:
-                errors.append("Larghezza collo obbligatoria")
-            if height <= 0:
-                errors.append("Altezza collo obbligatoria")
-
-            # Pallet dimensions validation
-            if use_pallet:
-                if pallet_length <= 0:
-                    errors.append("Lunghezza pallet obbligatoria")
-                if pallet_width <= 0:
-                    errors.append("Larghezza pallet obbligatoria")
-                if pallet_height <= 0:
-                    errors.append("Altezza pallet obbligatoria")
+            # Validation: table of (failed, message), evaluated in one pass
+            checks = (
+                (not address, "Indirizzo obbligatorio"),
+                (not zip_code, "CAP obbligatorio"),
+                (bool(zip_code) and not _valid_cap(zip_code), "CAP deve essere di 5 cifre"),
+                (not city, "Città obbligatoria"),
+                (time_end <= time_start, "Orario fine deve essere successivo all'orario inizio"),
+                # Dimensions validation: all required
+                (length <= 0, "Lunghezza collo obbligatoria"),
+                (width <= 0, "Larghezza collo obbligatoria"),
+                (height <= 0, "Altezza collo obbligatoria"),
+                # Pallet dimensions validation
+                (use_pallet and pallet_length <= 0, "Lunghezza pallet obbligatoria"),
+                (use_pallet and pallet_width <= 0, "Larghezza pallet obbligatoria"),
+                (use_pallet and pallet_height <= 0, "Altezza pallet obbligatoria"),
+            )
+            errors = [message for failed, message in checks if failed]
 
             if errors:
                 for error in errors:
@@ -1586,12 +1838,12 @@ def pickup_request_page():
                         time_start=time_start,
                         time_end=time_end,
                         company=company,
-                        contact_name=contact_name or "",
+                        contact_name=contact_name,
                         address=address,
                         zip_code=zip_code,
                         city=city,
-                        province=province or "",
-                        reference=reference or "",
+                        province=province,
+                        reference=reference,
                         num_packages=num_packages,
                         weight_per_package=weight_per_package,
                         length=length,
@@ -1602,7 +1854,7 @@ def pickup_request_page():
                         pallet_length=pallet_length,
                         pallet_width=pallet_width,
                         pallet_height=pallet_height,
-                        notes=notes or "",
+                        notes=notes,
                     )
 
                 if success:
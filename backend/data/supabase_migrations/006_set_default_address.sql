@@ -0,0 +1,12 @@
+-- Set the default pickup address in a single statement
+-- Run this in the Supabase SQL Editor
+-- Used by set_default_address (src/address_book.py) via client.rpc()
+
+CREATE OR REPLACE FUNCTION set_default_address(address_id TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE addresses
+    SET is_default = (id = address_id)
+    WHERE is_default OR id = address_id;
+$$;
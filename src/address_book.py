@@ -5,7 +5,8 @@ Address Book module for managing pickup addresses using Supabase.
 import uuid
 from datetime import datetime
 from typing import Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
+from functools import lru_cache
 
 import streamlit as st
 
@@ -16,7 +17,7 @@ from .config import get_supabase_client
 logger = get_logger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Address:
     """Address data structure."""
     id: str
@@ -31,6 +32,13 @@ class Address:
     is_default: bool = False
     created_at: str = ""
     updated_at: str = ""
+    # Formatted once at construction, so render loops only read attributes
+    display_name: str = field(default="", init=False, repr=False, compare=False)
+    summary: str = field(default="", init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.display_name = get_address_display_name(self)
+        self.summary = get_address_summary(self)
 
     def to_dict(self) -> dict:
         """Convert to dictionary for Supabase."""
@@ -73,10 +81,28 @@ def _get_supabase_client():
     return get_supabase_client()
 
 
+# Seconds a fetched address list is reused before re-reading Supabase
+ADDRESSES_CACHE_TTL = 60
+
+
+@st.cache_data(ttl=ADDRESSES_CACHE_TTL, show_spinner=False)
+def _fetch_address_rows() -> list[dict]:
+    """
+    Cached address rows, shared by all sessions.
+
+    The FastAPI backend writes to the same table, so this may lag behind
+    by up to ADDRESSES_CACHE_TTL seconds: use it for display only.
+
+    Returns:
+        List of row dicts ordered by name
+    """
+    response = _get_supabase_client().table("addresses").select("*").order("name").execute()
+    return response.data or []
+
+
 def _clear_cache():
     """Clear the addresses cache."""
-    if 'addresses_cache' in st.session_state:
-        del st.session_state['addresses_cache']
+    _fetch_address_rows.clear()
 
 
 def load_addresses() -> list[Address]:
@@ -92,13 +118,13 @@ def load_addresses() -> list[Address]:
             logger.error("Supabase client is None - check secrets configuration")
             return []
 
-        response = client.table("addresses").select("*").order("name").execute()
+        rows = _fetch_address_rows()
 
-        if not response.data:
+        if not rows:
             logger.info("No addresses found in Supabase (empty table)")
             return []
 
-        addresses = [Address.from_dict(row) for row in response.data]
+        addresses = [Address.from_dict(row) for row in rows]
         logger.debug(f"Loaded {len(addresses)} addresses from Supabase")
         return addresses
     except Exception as e:
@@ -122,16 +148,18 @@ def save_addresses(addresses: list[Address]) -> bool:
         if client is None:
             return False
 
-        # Upsert all addresses (insert or update, no data loss on failure)
-        for addr in addresses:
-            client.table("addresses").upsert(addr.to_dict(), on_conflict="id").execute()
+        # Upsert all addresses in one request (insert or update, no data loss on failure)
+        if addresses:
+            client.table("addresses").upsert(
+                [addr.to_dict() for addr in addresses], on_conflict="id"
+            ).execute()
 
-        # Remove addresses no longer in the list
+        # Remove addresses no longer in the list, in one request
         current_ids = {addr.id for addr in addresses}
         existing = client.table("addresses").select("id").execute()
-        for row in (existing.data or []):
-            if row["id"] not in current_ids:
-                client.table("addresses").delete().eq("id", row["id"]).execute()
+        stale_ids = [row["id"] for row in (existing.data or []) if row["id"] not in current_ids]
+        if stale_ids:
+            client.table("addresses").delete().in_("id", stale_ids).execute()
 
         _clear_cache()
         return True
@@ -139,9 +167,59 @@ def save_addresses(addresses: list[Address]) -> bool:
         return False
 
 
+def _like_literal(text: str) -> str:
+    """Escape LIKE wildcards so an ilike filter matches the text itself."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _name_taken(client, name: str, exclude_id: Optional[str] = None) -> bool:
+    """
+    Case-insensitive duplicate-name check, filtered server-side.
+
+    Args:
+        client: Supabase client
+        name: Candidate name
+        exclude_id: Address ID to skip (the one being renamed)
+
+    Returns:
+        True if another address already uses the name
+    """
+    query = client.table("addresses").select("id").ilike("name", _like_literal(name))
+    if exclude_id is not None:
+        query = query.neq("id", exclude_id)
+    return bool(query.limit(1).execute().data)
+
+
+def _select_flags(client, address_id: str) -> Optional[dict]:
+    """
+    Fetch only the id and default flag of one address.
+
+    Args:
+        client: Supabase client
+        address_id: The address ID to look for
+
+    Returns:
+        Row dict with "id" and "is_default", None if not found
+    """
+    response = client.table("addresses").select("id,is_default").eq("id", address_id).limit(1).execute()
+    return response.data[0] if response.data else None
+
+
+def _count_addresses(client) -> int:
+    """Count the addresses without fetching any row."""
+    response = client.table("addresses").select("id", count="exact", head=True).execute()
+    return response.count or 0
+
+
+def _select_first(query) -> Optional[Address]:
+    """Run a Supabase select limited to one row and convert it."""
+    response = query.limit(1).execute()
+    return Address.from_dict(response.data[0]) if response.data else None
+
+
 def get_address_by_id(address_id: str) -> Optional[Address]:
     """
-    Get a specific address by ID.
+    Get a specific address by ID (filtered server-side on the primary key).
 
     Args:
         address_id: The address ID to look for
@@ -149,26 +227,33 @@ def get_address_by_id(address_id: str) -> Optional[Address]:
     Returns:
         Address object if found, None otherwise
     """
-    addresses = load_addresses()
-    for addr in addresses:
-        if addr.id == address_id:
-            return addr
-    return None
+    try:
+        client = _get_supabase_client()
+        if client is None:
+            return None
+        return _select_first(client.table("addresses").select("*").eq("id", address_id))
+    except Exception as e:
+        logger.exception(f"Error loading address {address_id}: {e}")
+        return None
 
 
 def get_default_address() -> Optional[Address]:
     """
-    Get the default address.
+    Get the default address (filtered server-side).
 
     Returns:
         The default Address if one exists, None otherwise
     """
-    addresses = load_addresses()
-    for addr in addresses:
-        if addr.is_default:
-            return addr
-    # If no default, return first address if any exist
-    return addresses[0] if addresses else None
+    try:
+        client = _get_supabase_client()
+        if client is None:
+            return None
+        default = _select_first(client.table("addresses").select("*").eq("is_default", True))
+        # If no default, return first address if any exist
+        return default or _select_first(client.table("addresses").select("*").order("name"))
+    except Exception as e:
+        logger.exception(f"Error loading default address: {e}")
+        return None
 
 
 def add_address(
@@ -204,12 +289,8 @@ def add_address(
         if client is None:
             return None
 
-        addresses = load_addresses()
-
-        # Check for duplicate name
-        for addr in addresses:
-            if addr.name.lower() == name.lower():
-                return None  # Duplicate name
+        if _name_taken(client, name):
+            return None  # Duplicate name
 
         # Generate new ID
         new_id = f"addr_{uuid.uuid4().hex[:8]}"
@@ -220,7 +301,7 @@ def add_address(
             client.table("addresses").update({"is_default": False}).eq("is_default", True).execute()
 
         # If this is the first address, make it default
-        if not addresses:
+        if not is_default and _count_addresses(client) == 0:
             is_default = True
 
         new_address = Address(
@@ -262,24 +343,13 @@ def update_address(address_id: str, **kwargs) -> bool:
         if client is None:
             return False
 
-        addresses = load_addresses()
-
-        # Find the address
-        target = None
-        for addr in addresses:
-            if addr.id == address_id:
-                target = addr
-                break
-
-        if target is None:
+        if _select_flags(client, address_id) is None:
             return False
 
         # Check for duplicate name if name is being changed
         new_name = kwargs.get("name")
-        if new_name:
-            for addr in addresses:
-                if addr.id != address_id and addr.name.lower() == new_name.lower():
-                    return False  # Duplicate name
+        if new_name and _name_taken(client, new_name, exclude_id=address_id):
+            return False  # Duplicate name
 
         # Handle default flag
         if kwargs.get("is_default", False):
@@ -315,27 +385,27 @@ def delete_address(address_id: str) -> bool:
         if client is None:
             return False
 
-        addresses = load_addresses()
+        # Checks query Supabase directly: the cached list may miss rows
+        # written through the API
 
         # Don't allow deletion if it's the last address
-        if len(addresses) <= 1:
+        if _count_addresses(client) <= 1:
             return False
 
-        # Check if it's the default address
-        was_default = False
-        for addr in addresses:
-            if addr.id == address_id:
-                was_default = addr.is_default
-                break
+        # Unknown ID: nothing to delete, skip the round-trips
+        target = _select_flags(client, address_id)
+        if target is None:
+            return False
 
         # Delete the address
         client.table("addresses").delete().eq("id", address_id).execute()
 
         # If deleted address was default, make first remaining address default
-        if was_default:
-            remaining = [a for a in addresses if a.id != address_id]
-            if remaining:
-                client.table("addresses").update({"is_default": True}).eq("id", remaining[0].id).execute()
+        # (read after the delete, so rows removed meanwhile are not picked)
+        if target["is_default"]:
+            first_remaining = _select_first(client.table("addresses").select("*").order("name"))
+            if first_remaining is not None:
+                client.table("addresses").update({"is_default": True}).eq("id", first_remaining.id).execute()
 
         _clear_cache()
         return True
@@ -358,11 +428,14 @@ def set_default_address(address_id: str) -> bool:
         if client is None:
             return False
 
-        # Clear all defaults
-        client.table("addresses").update({"is_default": False}).eq("is_default", True).execute()
-
-        # Set new default
-        client.table("addresses").update({"is_default": True}).eq("id", address_id).execute()
+        try:
+            # One statement clears the old default and sets the new one
+            # (function from supabase_migrations/006_set_default_address.sql)
+            client.rpc("set_default_address", {"address_id": address_id}).execute()
+        except Exception as e:
+            logger.warning(f"set_default_address RPC unavailable, using two updates: {e}")
+            client.table("addresses").update({"is_default": False}).eq("is_default", True).execute()
+            client.table("addresses").update({"is_default": True}).eq("id", address_id).execute()
 
         _clear_cache()
         return True
@@ -370,6 +443,10 @@ def set_default_address(address_id: str) -> bool:
         return False
 
 
+# (prefix, suffix) of the display name, by is_default
+_DISPLAY_AFFIXES = {True: ("⭐ ", " (predefinito)"), False: ("📍 ", "")}
+
+
 def get_address_display_name(address: Address) -> str:
     """
     Get a display string for an address.
@@ -380,8 +457,7 @@ def get_address_display_name(address: Address) -> str:
     Returns:
         Formatted display string
     """
-    prefix = "⭐ " if address.is_default else "📍 "
-    suffix = " (predefinito)" if address.is_default else ""
+    prefix, suffix = _DISPLAY_AFFIXES[bool(address.is_default)]
     return f"{prefix}{address.name}{suffix}"
 
 
@@ -399,10 +475,12 @@ def get_address_summary(address: Address) -> str:
     return f"{address.street}, {address.zip} {address.city}{province_str}"
 
 
+@lru_cache(maxsize=1)
 def is_sheets_configured() -> bool:
     """
     Check if Supabase is properly configured.
     Uses centralized config which checks both env vars (Render) and st.secrets (local dev).
+    Secrets don't change for the process lifetime, so the result is computed once.
 
     Returns:
         True if configured, False otherwise
@@ -5,22 +5,44 @@ Supporta anche file HTML mascherati da XLS (export tipico di ShippyPro).
 """
 
 import re
-import subprocess
-import tempfile
+import sys
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Optional
 from io import BytesIO, StringIO
 
-import pandas as pd
-
 from .logging_config import get_logger
 
+if TYPE_CHECKING:
+    import pandas as pd  # Importato solo in lettura file (import lento)
+
 # Logger per questo modulo
 logger = get_logger(__name__)
 
+# Spazi da rimuovere dai tracking (compilata una volta sola)
+_WS_RE = re.compile(r'\s+')
 
-@dataclass
+# Suffisso numerico finale dell'ID ordine
+_NUM_SUFFIX_RE = re.compile(r'(\d+)$')
+
+
+def _is_missing(value) -> bool:
+    """
+    Equivalente di pd.isna per un singolo valore, senza importare pandas.
+
+    Args:
+        value: Valore di una cella
+
+    Returns:
+        True se il valore è None, NaN, pd.NA o NaT
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return True
+    # pd.NA / NaT possono esistere solo se pandas è già stato importato
+    pd = sys.modules.get('pandas')
+    return pd is not None and pd.isna(value) is True
+
+
+@dataclass(slots=True)
 class OrderInfo:
     """Informazioni di un singolo ordine."""
     row_index: int  # Posizione nel file Excel (0-indexed)
@@ -57,8 +79,8 @@ class ExcelParser:
     # Nomi colonne attesi (case-insensitive)
     # IMPORTANTE: l'ordine conta - le prime corrispondenze hanno priorità
     COLUMN_MAPPINGS = {
-        'order_id': ['id ordine marketplace', 'order id', 'id_ordine', 'orderid', 'id ordine'],
-        'tracking': [
+        'order_id': ('id ordine marketplace', 'order id', 'id_ordine', 'orderid', 'id ordine'),
+        'tracking': (
             # Nomi specifici tracking (priorità alta)
             'tracking', 'tracking number', 'trackingnumber', 'tracking_number',
             'n. spedizione', 'numero spedizione', 'n spedizione',
@@ -66,10 +88,13 @@ class ExcelParser:
             'codice tracking', 'codice spedizione',
             'shipment number', 'shipment id',
             'n. tracking', 'numero tracking',
-        ],
-        'carrier': ['corriere', 'carrier', 'courier', 'vettore'],
+        ),
+        'carrier': ('corriere', 'carrier', 'courier', 'vettore'),
     }
 
+    # Tutti i nomi colonna utili: le altre colonne non vengono caricate
+    _CANDIDATE_COLUMNS = frozenset(name for names in COLUMN_MAPPINGS.values() for name in names)
+
     # Colonne da escludere (NON sono tracking anche se contengono numeri)
     EXCLUDED_COLUMNS = [
         'telefono', 'phone', 'tel', 'mobile', 'cellulare',
@@ -91,9 +116,13 @@ class ExcelParser:
         Returns:
             Tracking senza spazi, uppercase
         """
-        if pd.isna(tracking):
+        if _is_missing(tracking):
             return ""
-        return re.sub(r'\s+', '', str(tracking)).upper()
+        tracking_str = str(tracking)
+        # Ogni spazio Unicode diverso da ' ' è non stampabile: se non ce ne sono, niente sub
+        if ' ' in tracking_str or not tracking_str.isprintable():
+            tracking_str = _WS_RE.sub('', tracking_str)
+        return tracking_str.upper()
 
     @staticmethod
     def extract_numeric_suffix(order_id: str) -> Optional[int]:
@@ -108,24 +137,28 @@ class ExcelParser:
         Returns:
             Suffisso numerico o None se non trovato
         """
-        if pd.isna(order_id):
+        if _is_missing(order_id):
             return None
+        # Copre anche l'ultimo segmento dopo underscore ("..._99")
+        match = _NUM_SUFFIX_RE.search(str(order_id))
+        return int(match.group(1)) if match else None
 
-        order_str = str(order_id)
+    @staticmethod
+    def _clean_column_name(column_name) -> str:
+        """Pulisce il nome colonna (rimuove spazi extra, newlines)."""
+        return str(column_name).strip().replace('\n', ' ')
 
-        # Cerca l'ultimo segmento dopo underscore
-        parts = order_str.split('_')
-        if len(parts) > 1:
-            last_part = parts[-1]
-            if last_part.isdigit():
-                return int(last_part)
+    def _is_candidate_column(self, column_name) -> bool:
+        """
+        Verifica se una colonna può corrispondere a uno dei campi richiesti.
 
-        # Fallback: cerca qualsiasi numero alla fine
-        match = re.search(r'(\d+)$', order_str)
-        if match:
-            return int(match.group(1))
+        Args:
+            column_name: Nome della colonna (come letto dal file)
 
-        return None
+        Returns:
+            True se la colonna va caricata
+        """
+        return self._clean_column_name(column_name).lower().strip() in self._CANDIDATE_COLUMNS
 
     def _is_excluded_column(self, column_name: str) -> bool:
         """
@@ -143,27 +176,38 @@ class ExcelParser:
                 return True
         return False
 
-    def _find_column(self, df: pd.DataFrame, column_type: str) -> Optional[str]:
+    @staticmethod
+    def _columns_index(columns) -> dict[str, str]:
+        """
+        Indicizza le colonne per nome normalizzato (lowercase, senza spazi ai bordi).
+
+        Args:
+            columns: Nomi delle colonne del DataFrame
+
+        Returns:
+            Dizionario nome normalizzato -> nome originale
+        """
+        return {col.lower().strip(): col for col in columns}
+
+    def _find_column(self, columns_lower: dict[str, str], column_type: str) -> Optional[str]:
         """
         Trova la colonna corrispondente nel DataFrame.
 
         Args:
-            df: DataFrame pandas
+            columns_lower: Indice delle colonne da _columns_index
             column_type: Tipo di colonna da cercare
 
         Returns:
             Nome della colonna trovata o None
         """
-        possible_names = self.COLUMN_MAPPINGS.get(column_type, [])
-        df_columns_lower = {col.lower().strip(): col for col in df.columns}
-
-        for name in possible_names:
-            if name in df_columns_lower:
-                found_col = df_columns_lower[name]
-                # Per tracking, verifica che non sia una colonna esclusa
-                if column_type == 'tracking' and self._is_excluded_column(found_col):
-                    continue
-                return found_col
+        for name in self.COLUMN_MAPPINGS.get(column_type, ()):
+            found_col = columns_lower.get(name)
+            if found_col is None:
+                continue
+            # Per tracking, verifica che non sia una colonna esclusa
+            if column_type == 'tracking' and self._is_excluded_column(found_col):
+                continue
+            return found_col
 
         return None
 
@@ -194,30 +238,56 @@ class ExcelParser:
     def _try_read_excel(
         self,
         file_input: bytes | BytesIO | str,
-        filename: str
-    ) -> pd.DataFrame:
+        filename: str,
+        usecols: Optional[Callable[[str], bool]] = None
+    ) -> tuple["pd.DataFrame", list[str]]:
         """
         Prova a leggere il file Excel con vari metodi.
 
         Args:
             file_input: File da leggere
             filename: Nome del file (per determinare il formato)
+            usecols: Filtro sui nomi colonna per i reader Excel/CSV (HTML legge tutto)
 
         Returns:
-            DataFrame con i dati
+            Tupla (DataFrame con i dati, nomi di tutte le colonne del file,
+            comprese quelle scartate da usecols)
 
         Raises:
             ExcelParserError: Se la lettura fallisce
         """
+        import pandas as pd
+
         errors = []
 
+        # Intestazione vista dal reader in corso: usecols riceve ogni nome colonna
+        # (read_csv anche più volte), il dict tiene l'ordine senza duplicati
+        header: dict = {}
+
+        def select_column(column_name) -> bool:
+            header[column_name] = None
+            return usecols(column_name)
+
+        def read_kwargs() -> dict:
+            header.clear()
+            return {'usecols': select_column} if usecols else {}
+
+        def is_loaded(df: "pd.DataFrame", min_columns: int = 1) -> bool:
+            # Stesso criterio di una lettura completa: colonne contate sull'intestazione;
+            # senza colonne selezionate il numero di righe non è noto e basta l'intestazione
+            columns = list(header) if usecols else df.columns
+            if len(columns) < min_columns:
+                return False
+            return not df.empty or (usecols is not None and df.columns.empty)
+
+        def loaded(df: "pd.DataFrame") -> tuple["pd.DataFrame", list[str]]:
+            return df, list(header) if usecols else df.columns.tolist()
+
         # Prepara l'input
         if isinstance(file_input, bytes):
             file_bytes = file_input
         elif isinstance(file_input, BytesIO):
-            file_input.seek(0)
-            file_bytes = file_input.read()
-            file_input.seek(0)
+            file_bytes = file_input.getvalue()
         else:
             with open(file_input, 'rb') as f:
                 file_bytes = f.read()
@@ -231,7 +301,7 @@ class ExcelParser:
                 html_str = file_bytes.decode('utf-8', errors='ignore')
                 dfs = pd.read_html(StringIO(html_str))
                 if dfs and not dfs[0].empty:
-                    return dfs[0]
+                    return dfs[0], dfs[0].columns.tolist()
             except Exception as e:
                 errors.append(f"HTML: {str(e)}")
 
@@ -241,43 +311,43 @@ class ExcelParser:
                     html_str = file_bytes.decode(encoding, errors='ignore')
                     dfs = pd.read_html(StringIO(html_str))
                     if dfs and not dfs[0].empty:
-                        return dfs[0]
+                        return dfs[0], dfs[0].columns.tolist()
                 except Exception:
                     pass
 
-        # Metodo 2: XLSX con openpyxl
+        # Metodo 2: calamine (parser Rust, legge sia XLSX che XLS senza creare oggetti Cell)
+        if real_type in ('xlsx', 'xls', 'unknown'):
+            try:
+                df = pd.read_excel(BytesIO(file_bytes), engine='calamine', **read_kwargs())
+                if is_loaded(df):
+                    return loaded(df)
+            except Exception as e:
+                errors.append(f"calamine: {str(e)}")
+
+        # Metodo 3: XLSX con openpyxl
         if real_type in ('xlsx', 'unknown'):
             try:
-                df = pd.read_excel(BytesIO(file_bytes), engine='openpyxl')
-                if not df.empty:
-                    return df
+                df = pd.read_excel(BytesIO(file_bytes), engine='openpyxl', **read_kwargs())
+                if is_loaded(df):
+                    return loaded(df)
             except Exception as e:
                 errors.append(f"openpyxl: {str(e)}")
 
-        # Metodo 3: XLS con xlrd
+        # Metodo 3a: XLS con xlrd
         if real_type in ('xls', 'unknown'):
             try:
-                df = pd.read_excel(BytesIO(file_bytes), engine='xlrd')
-                if not df.empty:
-                    return df
+                df = pd.read_excel(BytesIO(file_bytes), engine='xlrd', **read_kwargs())
+                if is_loaded(df):
+                    return loaded(df)
             except Exception as e:
                 errors.append(f"xlrd: {str(e)}")
 
-        # Metodo 3a: Prova calamine (parser Rust, più robusto)
-        if real_type in ('xls', 'xlsx', 'unknown'):
-            try:
-                df = pd.read_excel(BytesIO(file_bytes), engine='calamine')
-                if not df.empty:
-                    return df
-            except Exception as e:
-                errors.append(f"calamine: {str(e)}")
-
         # Metodo 3b: Prova openpyxl anche per XLS (a volte funziona)
         if real_type == 'xls':
             try:
-                df = pd.read_excel(BytesIO(file_bytes), engine='openpyxl')
-                if not df.empty:
-                    return df
+                df = pd.read_excel(BytesIO(file_bytes), engine='openpyxl', **read_kwargs())
+                if is_loaded(df):
+                    return loaded(df)
             except Exception as e:
                 errors.append(f"openpyxl (xls fallback): {str(e)}")
 
@@ -288,7 +358,7 @@ class ExcelParser:
                     html_str = file_bytes.decode(encoding, errors='ignore')
                     dfs = pd.read_html(StringIO(html_str))
                     if dfs and not dfs[0].empty:
-                        return dfs[0]
+                        return dfs[0], dfs[0].columns.tolist()
                 except Exception:
                     pass
             errors.append("HTML (xls fallback): nessun encoding valido")
@@ -301,19 +371,20 @@ class ExcelParser:
                         df = pd.read_csv(
                             BytesIO(file_bytes),
                             sep=sep,
-                            encoding=encoding
+                            encoding=encoding,
+                            **read_kwargs()
                         )
-                        if not df.empty and len(df.columns) > 1:
-                            return df
+                        if is_loaded(df, min_columns=2):
+                            return loaded(df)
                     except Exception:
                         pass
             errors.append("CSV: nessun formato valido trovato")
 
         # Metodo 5: Auto-detect pandas
         try:
-            df = pd.read_excel(BytesIO(file_bytes))
-            if not df.empty:
-                return df
+            df = pd.read_excel(BytesIO(file_bytes), **read_kwargs())
+            if is_loaded(df):
+                return loaded(df)
         except Exception as e:
             errors.append(f"auto: {str(e)}")
 
@@ -322,7 +393,7 @@ class ExcelParser:
             html_str = file_bytes.decode('utf-8', errors='replace')
             dfs = pd.read_html(StringIO(html_str))
             if dfs and not dfs[0].empty:
-                return dfs[0]
+                return dfs[0], dfs[0].columns.tolist()
         except Exception as e:
             errors.append(f"HTML fallback: {str(e)}")
 
@@ -332,45 +403,6 @@ class ExcelParser:
             f"Errori:\n" + "\n".join(f"  - {e}" for e in errors)
         )
 
-    def _convert_with_libreoffice(self, filepath: str) -> pd.DataFrame:
-        """
-        Converte un file XLS legacy usando LibreOffice.
-
-        Args:
-            filepath: Path al file XLS
-
-        Returns:
-            DataFrame con i dati
-
-        Raises:
-            ExcelParserError: Se la conversione fallisce
-        """
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Converti a XLSX
-            result = subprocess.run(
-                [
-                    'libreoffice',
-                    '--headless',
-                    '--convert-to', 'xlsx',
-                    '--outdir', tmpdir,
-                    filepath
-                ],
-                capture_output=True,
-                timeout=30
-            )
-
-            if result.returncode != 0:
-                raise ExcelParserError(
-                    f"LibreOffice conversion failed: {result.stderr.decode()}"
-                )
-
-            # Trova il file convertito
-            converted_files = list(Path(tmpdir).glob('*.xlsx'))
-            if not converted_files:
-                raise ExcelParserError("File XLSX non trovato dopo conversione")
-
-            return pd.read_excel(converted_files[0], engine='openpyxl')
-
     def parse_excel(
         self,
         file_input: bytes | BytesIO | str,
@@ -392,17 +424,18 @@ class ExcelParser:
         logger.info(f"Parsing Excel file: {filename}")
         warnings = []
 
-        # Leggi il file
-        df = self._try_read_excel(file_input, filename)
+        # Leggi il file una volta sola, caricando solo le colonne con nomi riconosciuti
+        df, file_columns = self._try_read_excel(file_input, filename, usecols=self._is_candidate_column)
         logger.debug(f"DataFrame loaded: {len(df)} rows, columns: {df.columns.tolist()}")
 
         # Pulisci nomi colonne (rimuovi spazi extra, newlines)
-        df.columns = [str(col).strip().replace('\n', ' ') for col in df.columns]
+        df.columns = [self._clean_column_name(col) for col in df.columns]
 
         # Trova le colonne necessarie
-        order_id_col = self._find_column(df, 'order_id')
-        tracking_col = self._find_column(df, 'tracking')
-        carrier_col = self._find_column(df, 'carrier')
+        columns_lower = self._columns_index(df.columns)
+        order_id_col = self._find_column(columns_lower, 'order_id')
+        tracking_col = self._find_column(columns_lower, 'tracking')
+        carrier_col = self._find_column(columns_lower, 'carrier')
 
         logger.debug(f"Column mapping: order_id='{order_id_col}', tracking='{tracking_col}', carrier='{carrier_col}'")
 
@@ -416,33 +449,42 @@ class ExcelParser:
 
         if missing_cols:
             logger.error(f"Missing required columns: {missing_cols}")
+            all_columns = [self._clean_column_name(col) for col in file_columns]
             raise ExcelParserError(
                 f"Colonne mancanti nel file Excel: {', '.join(missing_cols)}.\n"
-                f"Colonne trovate: {', '.join(df.columns.tolist())}"
+                f"Colonne trovate: {', '.join(all_columns)}"
             )
 
-        # Estrai gli ordini
-        orders = []
-        empty_tracking_count = 0
-        for idx, row in df.iterrows():
-            tracking = self.normalize_tracking(row[tracking_col])
-
-            if not tracking:
-                empty_tracking_count += 1
-                warnings.append(f"Riga {idx + 2}: tracking vuoto, ignorata")
-                continue
-
-            order_id = str(row[order_id_col]) if not pd.isna(row[order_id_col]) else ""
-            carrier = str(row[carrier_col]) if not pd.isna(row[carrier_col]) else ""
+        # Estrai gli ordini con operazioni vettoriali sulle colonne (niente iterrows)
+        trackings = (
+            df[tracking_col].where(df[tracking_col].notna(), "").astype(str)
+            .str.replace(_WS_RE, '', regex=True).str.upper()
+        )
+        order_ids = df[order_id_col].where(df[order_id_col].notna(), "").astype(str)
+        carriers = df[carrier_col].where(df[carrier_col].notna(), "").astype(str)
+        suffixes = order_ids.str.extract(_NUM_SUFFIX_RE, expand=False)
+        valid = trackings.ne("")
 
-            order = OrderInfo(
+        orders = [
+            OrderInfo(
                 row_index=idx,
                 order_id=order_id,
                 tracking=tracking,
                 carrier=carrier,
-                numeric_suffix=self.extract_numeric_suffix(order_id)
+                numeric_suffix=int(suffix) if isinstance(suffix, str) else None
             )
-            orders.append(order)
+            for idx, order_id, tracking, carrier, suffix in zip(
+                df.index[valid].tolist(),
+                order_ids[valid].tolist(),
+                trackings[valid].tolist(),
+                carriers[valid].tolist(),
+                suffixes[valid].tolist(),
+            )
+        ]
+
+        empty_rows = df.index[~valid].tolist()
+        empty_tracking_count = len(empty_rows)
+        warnings.extend(f"Riga {idx + 2}: tracking vuoto, ignorata" for idx in empty_rows)
 
         if empty_tracking_count > 0:
             logger.warning(f"Skipped {empty_tracking_count} rows with empty tracking")
@@ -31,7 +31,7 @@ class MatchType(Enum):
     NONE = "none"                # Nessun match
 
 
-@dataclass
+@dataclass(slots=True)
 class MatchResult:
     """Risultato del match per una singola pagina."""
     page_number: int         # Numero pagina PDF (1-indexed)
@@ -80,6 +80,8 @@ class Matcher:
         self._tracking_index: dict[str, OrderInfo] = {}
         # Lista di tutti i tracking per fuzzy matching
         self._all_trackings: list[tuple[str, OrderInfo]] = []
+        # Stessi tracking raggruppati per lunghezza: (posizione, tracking, ordine)
+        self._trackings_by_length: dict[int, list[tuple[int, str, OrderInfo]]] = {}
 
         for order in excel_data.orders:
             if order.tracking:
@@ -95,6 +97,9 @@ class Matcher:
                     self._tracking_index[stripped] = order
 
                 # Salva per fuzzy matching
+                self._trackings_by_length.setdefault(len(normalized), []).append(
+                    (len(self._all_trackings), normalized, order)
+                )
                 self._all_trackings.append((normalized, order))
 
         logger.info(f"Matcher initialized: {len(self._all_trackings)} Excel trackings indexed, "
@@ -116,6 +121,28 @@ class Matcher:
             return max(len(s1), len(s2))
         return sum(c1 != c2 for c1, c2 in zip(s1, s2))
 
+    def _candidates(self, min_len: int, max_len: int) -> list[tuple[str, OrderInfo]]:
+        """
+        Tracking Excel con lunghezza compresa tra min_len e max_len.
+
+        Restituiti nell'ordine di _all_trackings, così il primo/miglior match
+        è lo stesso di una scansione completa.
+
+        Args:
+            min_len: Lunghezza minima (inclusa)
+            max_len: Lunghezza massima (inclusa)
+
+        Returns:
+            Lista di (tracking, ordine)
+        """
+        entries = [
+            entry
+            for length in range(max(min_len, 1), max_len + 1)
+            for entry in self._trackings_by_length.get(length, ())
+        ]
+        entries.sort(key=lambda entry: entry[0])
+        return [(tracking, order) for _, tracking, order in entries]
+
     def _find_order_by_tracking(self, tracking: str) -> tuple[Optional[OrderInfo], MatchType, int]:
         """
         Cerca un ordine dato il tracking con diversi metodi di matching.
@@ -141,7 +168,13 @@ class Matcher:
             return self._tracking_index[tracking_stripped], MatchType.NORMALIZED, 98
 
         # 3. Match parziale SICURO (richiede almeno 80% di sovrapposizione)
-        for excel_tracking, order in self._all_trackings:
+        # Solo lunghezze compatibili con la soglia (margine di 1 per arrotondamenti)
+        length = len(tracking_normalized)
+        partial_candidates = self._candidates(
+            int(length * self.PARTIAL_MATCH_MIN_OVERLAP) - 1,
+            int(length / self.PARTIAL_MATCH_MIN_OVERLAP) + 1,
+        )
+        for excel_tracking, order in partial_candidates:
             # PDF tracking contiene Excel tracking
             if tracking_normalized.endswith(excel_tracking):
                 overlap = len(excel_tracking) / len(tracking_normalized)
@@ -160,7 +193,7 @@ class Matcher:
         best_match = None
         best_confidence = 0
 
-        for excel_tracking, order in self._all_trackings:
+        for excel_tracking, order in self._candidates(length - 1, length + 1):
             # Solo se lunghezze simili (differenza max 1)
             len_diff = abs(len(tracking_normalized) - len(excel_tracking))
             if len_diff > 1:
@@ -16,8 +16,12 @@ from .logging_config import get_logger
 # Logger per questo modulo
 logger = get_logger(__name__)
 
+# Regex di normalizzazione, compilate una volta sola
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_ALNUM_RE = re.compile(r'[^A-Z0-9]')
 
-@dataclass
+
+@dataclass(slots=True)
 class PageInfo:
     """Informazioni estratte da una singola pagina PDF."""
     page_number: int  # 1-indexed
@@ -101,7 +105,7 @@ class PDFProcessor:
         Returns:
             Tracking number senza spazi
         """
-        return re.sub(r'\s+', '', tracking).upper()
+        return _WHITESPACE_RE.sub('', tracking).upper()
 
     def _detect_carrier_from_text(self, text: str) -> Optional[str]:
         """
@@ -257,7 +261,7 @@ class PDFProcessor:
             return False
 
         # Rimuovi caratteri non validi che potrebbero essere stati catturati
-        tracking = re.sub(r'[^A-Z0-9]', '', tracking.upper())
+        tracking = _NON_ALNUM_RE.sub('', tracking.upper())
 
         # Escludi numeri di telefono
         if self._is_phone_number(tracking):
@@ -293,6 +297,46 @@ class PDFProcessor:
         # Per corrieri non specificati, accetta qualsiasi tracking abbastanza lungo
         return len(tracking) >= min_len
 
+    def _extract_page(self, doc, page_num: int) -> PageInfo:
+        """
+        Estrae testo e tracking da una singola pagina.
+
+        Args:
+            doc: Documento PyMuPDF aperto
+            page_num: Indice pagina (0-indexed)
+
+        Returns:
+            PageInfo della pagina (con extraction_error in caso di errore)
+        """
+        try:
+            # Estrai testo dalla pagina
+            text = doc[page_num].get_text("text")
+
+            # Estrai tracking
+            tracking, carrier = self.extract_tracking_from_text(text)
+
+            if tracking:
+                logger.debug(f"Page {page_num + 1}: extracted tracking={tracking}, carrier={carrier}")
+            else:
+                logger.debug(f"Page {page_num + 1}: no tracking found")
+
+            return PageInfo(
+                page_number=page_num + 1,  # 1-indexed
+                tracking=tracking,
+                carrier=carrier,
+                raw_text=text[:500]  # Limita per memoria
+            )
+
+        except Exception as e:
+            logger.warning(f"Page {page_num + 1}: extraction error - {e}")
+            return PageInfo(
+                page_number=page_num + 1,
+                tracking=None,
+                carrier=None,
+                raw_text="",
+                extraction_error=str(e)
+            )
+
     def process_pdf(self, pdf_input: bytes | BytesIO | str) -> PDFData:
         """
         Processa un PDF ed estrae le informazioni da ogni pagina.
@@ -310,66 +354,30 @@ class PDFProcessor:
 
         try:
             if isinstance(pdf_input, str):
-                doc = fitz.open(pdf_input)
                 with open(pdf_input, 'rb') as f:
                     pdf_bytes = f.read()
                 logger.debug(f"Opened PDF from file path: {pdf_input}")
             elif isinstance(pdf_input, BytesIO):
                 pdf_bytes = pdf_input.getvalue()
-                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
                 logger.debug(f"Opened PDF from BytesIO: {len(pdf_bytes)} bytes")
             else:
                 pdf_bytes = pdf_input
-                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
                 logger.debug(f"Opened PDF from bytes: {len(pdf_bytes)} bytes")
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         except Exception as e:
             logger.error(f"Failed to open PDF: {e}")
             raise ValueError(f"Impossibile aprire il PDF: {str(e)}")
 
-        logger.info(f"PDF has {len(doc)} pages")
-        pages = []
-        extracted_count = 0
-        failed_count = 0
+        total_pages = len(doc)
+        logger.info(f"PDF has {total_pages} pages")
 
         try:
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-
-                try:
-                    # Estrai testo dalla pagina
-                    text = page.get_text("text")
-
-                    # Estrai tracking
-                    tracking, carrier = self.extract_tracking_from_text(text)
-
-                    page_info = PageInfo(
-                        page_number=page_num + 1,  # 1-indexed
-                        tracking=tracking,
-                        carrier=carrier,
-                        raw_text=text[:500]  # Limita per memoria
-                    )
-
-                    if tracking:
-                        extracted_count += 1
-                        logger.debug(f"Page {page_num + 1}: extracted tracking={tracking}, carrier={carrier}")
-                    else:
-                        logger.debug(f"Page {page_num + 1}: no tracking found")
-
-                except Exception as e:
-                    failed_count += 1
-                    logger.warning(f"Page {page_num + 1}: extraction error - {e}")
-                    page_info = PageInfo(
-                        page_number=page_num + 1,
-                        tracking=None,
-                        carrier=None,
-                        raw_text="",
-                        extraction_error=str(e)
-                    )
-
-                pages.append(page_info)
+            pages = [self._extract_page(doc, page_num) for page_num in range(total_pages)]
         finally:
             doc.close()
 
+        extracted_count = sum(1 for p in pages if p.tracking)
+        failed_count = sum(1 for p in pages if p.extraction_error)
         logger.info(f"PDF processing complete: {extracted_count} tracking extracted, {failed_count} errors")
 
         return PDFData(
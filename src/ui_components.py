@@ -5,6 +5,8 @@ All functions return HTML strings meant for st.markdown(unsafe_allow_html=True).
 Color palette: Cool Indigo (#6366f1).
 """
 
+from functools import lru_cache
+
 # ---------------------------------------------------------------------------
 # Color tokens
 # ---------------------------------------------------------------------------
@@ -36,6 +38,7 @@ TOOLS = [
 # ---------------------------------------------------------------------------
 # Theme CSS — global styles injected once at app start
 # ---------------------------------------------------------------------------
+@lru_cache(maxsize=None)
 def get_theme_css() -> str:
     """Return a <style> block that hides the Streamlit sidebar and applies
     the Cool Indigo theme to the whole page."""
@@ -104,6 +107,7 @@ def render_nav_header(dev_mode: bool = False) -> str:
 # ---------------------------------------------------------------------------
 # Nav CSS — restyle st.radio as a tab bar
 # ---------------------------------------------------------------------------
+@lru_cache(maxsize=None)
 def get_nav_css() -> str:
     """Return a <style> block that turns st.radio into a horizontal tab bar."""
     return f"""<style>
@@ -15,6 +15,7 @@ from io import BytesIO
 from pathlib import Path
 from datetime import datetime, timedelta
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import pandas as pd
 
@@ -83,6 +84,18 @@ class ZipValidator:
     # Default phone number to use when phone is missing
     DEFAULT_PHONE = "393445556667"
 
+    # Country names accepted in the Excel "Country" column -> ISO code
+    COUNTRY_CODES = {
+        'ITALY': 'IT', 'ITALIA': 'IT',
+        'GERMANY': 'DE', 'DEUTSCHLAND': 'DE',
+        'FRANCE': 'FR',
+        'SPAIN': 'ES', 'ESPAÑA': 'ES', 'ESPANA': 'ES',
+        'UNITED KINGDOM': 'GB', 'UK': 'GB', 'GREAT BRITAIN': 'GB',
+    }
+
+    # Concurrent Google Address Validation requests
+    API_MAX_WORKERS = 5
+
     def __init__(self, confidence_threshold: int = 90, street_confidence_threshold: int = 85,
                  google_api_key: Optional[str] = None, anthropic_api_key: Optional[str] = None):
         """
@@ -299,6 +312,69 @@ class ZipValidator:
 
         return col_map
 
+    def _normalize_countries(self, column: pd.Series) -> tuple[list[str], list[str]]:
+        """
+        Normalize an Excel country column in one vectorized pass.
+
+        Args:
+            column: The mapped "Country" column
+
+        Returns:
+            Tuple of (explicit values, ISO codes) per row. The explicit value
+            is "" when the cell is empty; the code is "" when the value is
+            neither a known country name nor a 2-letter code.
+        """
+        explicit = column.astype('string').str.strip().str.upper().fillna('')
+        codes = explicit.map(self.COUNTRY_CODES)
+        codes = codes.where(codes.notna(), explicit.where(explicit.str.len() == 2)).fillna('')
+        return explicit.tolist(), codes.tolist()
+
+    @staticmethod
+    def _pad_zip(original_zip: str) -> str:
+        """Pad a numeric ZIP to 5 digits (Excel drops leading zeros)."""
+        try:
+            return str(int(float(str(original_zip)))).zfill(5)
+        except (ValueError, TypeError):
+            return str(original_zip).strip()
+
+    def _fetch_validations(
+        self,
+        requests_by_key: dict[tuple, tuple[ParsedAddress, str, str, str]],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> dict[tuple, Optional[dict]]:
+        """
+        Call the Google API once per distinct address, concurrently.
+
+        Args:
+            requests_by_key: Request key -> (parsed, city, zip_padded, state)
+            progress_callback: Optional callback(current, total, message)
+
+        Returns:
+            Dict mapping request key -> API response (None on failure)
+        """
+        responses = {}
+        total = len(requests_by_key)
+        if not total:
+            return responses
+
+        with ThreadPoolExecutor(max_workers=self.API_MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(self.address_validator.validate_address, *args): key
+                for key, args in requests_by_key.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                key = futures[future]
+                try:
+                    responses[key] = future.result()
+                except Exception as e:
+                    logger.error(f"Google API lookup failed: {e}")
+                    responses[key] = None
+                if progress_callback:
+                    pct = 20 + int(done / total * 80)
+                    progress_callback(pct, 100, f"Validating address {done}/{total}...")
+
+        return responses
+
     # =========================================================================
     # Main pipeline
     # =========================================================================
@@ -339,6 +415,8 @@ class ZipValidator:
             )
 
         has_country_col = col_map.get('country') is not None
+        if has_country_col:
+            explicit_countries, country_codes = self._normalize_countries(df[col_map['country']])
         has_state_col = col_map.get('state') is not None
         total = len(df)
 
@@ -361,12 +439,39 @@ class ZipValidator:
         logger.info(f"Parsing complete: {self.address_parser.metrics.claude_parsed} by Claude, "
                      f"{self.address_parser.metrics.regex_fallback} by regex")
 
-        # --- Step 2: Validate each address ---
+        # --- Step 2: Google lookups, one per distinct address, concurrently ---
+        countries = [parsed.country_code for parsed in parsed_addresses]
+        countries_detected = [True] * total
+        if has_country_col:
+            for i, explicit in enumerate(explicit_countries):
+                if explicit:
+                    # Normalized to a 2-letter code once per DataFrame
+                    if country_codes[i]:
+                        countries[i] = country_codes[i]
+                    countries_detected[i] = False
+
+        states = [''] * total
+        if has_state_col:
+            states = [str(v).strip() if pd.notna(v) else '' for v in df[col_map['state']]]
+
+        request_keys = [None] * total
+        api_requests = {}
+        for i, parsed in enumerate(parsed_addresses):
+            if countries[i] != 'IT':
+                continue
+            city = raw_addresses[i]["city"]
+            zip_padded = self._pad_zip(raw_addresses[i]["zip"])
+            # Same fields as the API payload: identical rows share one call
+            key = (parsed.country_code, parsed.street_with_number, city, zip_padded, states[i])
+            request_keys[i] = key
+            api_requests.setdefault(key, (parsed, city, zip_padded, states[i]))
+
+        api_responses = self._fetch_validations(api_requests, progress_callback)
+        logger.info(f"Google API: {len(api_requests)} lookups for "
+                    f"{sum(key is not None for key in request_keys)} IT addresses")
+
+        # --- Step 3: Interpret each address ---
         for i, (idx, row) in enumerate(df.iterrows()):
-            if progress_callback:
-                pct = 20 + int((i + 1) / total * 80)
-                progress_callback(pct, 100, f"Validating address {i + 1}/{total}...")
-
             parsed = parsed_addresses[i]
 
             name = str(row.get(col_map.get('name', ''), ''))
@@ -374,11 +479,8 @@ class ZipValidator:
             city = str(row.get(col_map['city'], ''))
             original_zip = str(row.get(col_map['zip'], ''))
 
-            # Get state/province if available
-            state = ''
-            if has_state_col:
-                state_raw = row.get(col_map['state'], '')
-                state = str(state_raw).strip() if pd.notna(state_raw) else ''
+            # State/province (empty if no column)
+            state = states[i]
 
             # Get phone — track if missing
             phone_col = col_map.get('phone')
@@ -410,28 +512,9 @@ class ZipValidator:
                     po_valid, po_extracted, po_error = self.validate_po_number(po_value)
                     po_invalid = not po_valid
 
-            # Get country from Claude parsing or Excel column
-            country = parsed.country_code
-            country_detected = True
-            if has_country_col:
-                country_raw = row.get(col_map['country'], '')
-                country_explicit = str(country_raw).strip() if pd.notna(country_raw) and str(country_raw).strip() else ''
-                if country_explicit:
-                    # Normalize to 2-letter code
-                    country_upper = country_explicit.upper()
-                    if country_upper in ('ITALY', 'ITALIA'):
-                        country = 'IT'
-                    elif country_upper in ('GERMANY', 'DEUTSCHLAND'):
-                        country = 'DE'
-                    elif country_upper in ('FRANCE',):
-                        country = 'FR'
-                    elif country_upper in ('SPAIN', 'ESPAÑA', 'ESPANA'):
-                        country = 'ES'
-                    elif country_upper in ('UNITED KINGDOM', 'UK', 'GREAT BRITAIN'):
-                        country = 'GB'
-                    elif len(country_explicit) == 2:
-                        country = country_upper
-                    country_detected = False
+            # Country from Claude parsing or Excel column
+            country = countries[i]
+            country_detected = countries_detected[i]
 
             # Skip non-IT countries
             if country not in ('IT',):
@@ -458,15 +541,10 @@ class ZipValidator:
                 continue
 
             # Pad ZIP for Italian addresses
-            try:
-                zip_padded = str(int(float(str(original_zip)))).zfill(5)
-            except (ValueError, TypeError):
-                zip_padded = str(original_zip).strip()
+            zip_padded = self._pad_zip(original_zip)
 
-            # --- Call Google Address Validation API ---
-            api_response = self.address_validator.validate_address(
-                parsed, city, zip_padded, state
-            )
+            # --- Google Address Validation API response (fetched in Step 2) ---
+            api_response = api_responses.get(request_keys[i])
 
             if not api_response or "result" not in api_response:
                 # API unavailable — mark for review
@@ -679,35 +757,26 @@ class ZipValidator:
                 lambda x: "'" + str(x) if isinstance(x, str) and x and x[0] in ('=', '+', '-', '@', '\t', '\r', '\n') else x
             )
 
+        # Format ZIPs in the DataFrame before writing, so each cell is written
+        # once (padded to 5 digits for Italian addresses only)
+        if zip_col:
+            countries = df[country_col] if country_col else [''] * len(df)
+            df[zip_col] = [
+                self._format_output_zip(raw, country)
+                for raw, country in zip(df[zip_col], countries)
+            ]
+
         output = BytesIO()
 
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
             df.to_excel(writer, index=False, sheet_name='Corrected')
             worksheet = writer.sheets['Corrected']
 
-            # Format ZIP column as text with leading zeros preserved (IT only)
+            # ZIP column as text so leading zeros survive
             if zip_col:
-                from openpyxl.styles import numbers
                 zip_col_idx = list(df.columns).index(zip_col) + 1
-                country_col = col_map.get('country')
-                country_col_idx = list(df.columns).index(country_col) + 1 if country_col else None
                 for row in range(2, len(df) + 2):
-                    cell = worksheet.cell(row=row, column=zip_col_idx)
-                    cell.number_format = '@'
-                    raw = cell.value
-                    if raw is not None:
-                        # Only pad to 5 digits for Italian addresses
-                        is_it = True
-                        if country_col_idx:
-                            country_cell = worksheet.cell(row=row, column=country_col_idx)
-                            is_it = str(country_cell.value).upper().strip() in ('IT', 'ITALY', 'ITALIA', '')
-                        if is_it:
-                            try:
-                                cell.value = str(int(float(str(raw)))).zfill(5)
-                            except (ValueError, TypeError):
-                                cell.value = str(raw)
-                        else:
-                            cell.value = str(raw)
+                    worksheet.cell(row=row, column=zip_col_idx).number_format = '@'
 
             # Auto-fit column widths
             for col_idx, col in enumerate(df.columns):
@@ -720,6 +789,19 @@ class ZipValidator:
 
         return output.getvalue()
 
+    @staticmethod
+    def _format_output_zip(raw, country):
+        """ZIP value for the corrected Excel: text, zero-padded for IT rows."""
+        if raw is None or (not isinstance(raw, str) and pd.isna(raw)):
+            return raw
+        is_it = pd.notna(country) and str(country).upper().strip() in ('IT', 'ITALY', 'ITALIA', '')
+        if is_it:
+            try:
+                return str(int(float(str(raw)))).zfill(5)
+            except (ValueError, TypeError):
+                pass
+        return str(raw)
+
     def generate_review_report(self, report: ValidationReport) -> bytes:
         """Generate Excel report for items needing manual review."""
         from openpyxl.utils import get_column_letter
@@ -5,11 +5,12 @@ Test per il modulo excel_parser.
 import pytest
 import sys
 import os
+from io import BytesIO
 
 # Aggiungi il path del progetto
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.excel_parser import ExcelParser
+from src.excel_parser import ExcelParser, ExcelParserError
 
 
 class TestExcelParser:
@@ -98,25 +99,64 @@ class TestColumnMapping:
         """Match esatto nome colonna."""
         import pandas as pd
         df = pd.DataFrame(columns=["ID Ordine Marketplace", "Tracking", "Corriere"])
-        assert self.parser._find_column(df, "order_id") == "ID Ordine Marketplace"
+        assert self.parser._find_column(self.parser._columns_index(df.columns), "order_id") == "ID Ordine Marketplace"
 
     def test_find_column_case_insensitive(self):
         """Match case insensitive."""
         import pandas as pd
         df = pd.DataFrame(columns=["id ordine marketplace", "tracking", "corriere"])
-        assert self.parser._find_column(df, "order_id") == "id ordine marketplace"
+        assert self.parser._find_column(self.parser._columns_index(df.columns), "order_id") == "id ordine marketplace"
 
     def test_find_column_alternative_name(self):
         """Match nome alternativo."""
         import pandas as pd
         df = pd.DataFrame(columns=["Order ID", "Tracking Number", "Carrier"])
-        assert self.parser._find_column(df, "order_id") == "Order ID"
+        assert self.parser._find_column(self.parser._columns_index(df.columns), "order_id") == "Order ID"
 
     def test_find_column_not_found(self):
         """Colonna non trovata."""
         import pandas as pd
         df = pd.DataFrame(columns=["Col1", "Col2", "Col3"])
-        assert self.parser._find_column(df, "order_id") is None
+        assert self.parser._find_column(self.parser._columns_index(df.columns), "order_id") is None
+
+
+class TestParseExcel:
+    """Test per l'estrazione degli ordini."""
+
+    def setup_method(self):
+        """Setup per ogni test."""
+        self.parser = ExcelParser()
+
+    def test_parse_orders_and_empty_tracking(self):
+        """Ordini normalizzati, righe senza tracking segnalate."""
+        csv = (
+            "ID Ordine Marketplace,Tracking,Corriere\n"
+            "3501512414_ORIGINS_99,63 3270 2261,DHL\n"
+            "ORDER_ABC,,UPS\n"
+            ",1z fc2 577,\n"
+        ).encode()
+        data = self.parser.parse_excel(csv, "orders.csv")
+
+        assert [(o.row_index, o.order_id, o.tracking, o.carrier, o.numeric_suffix) for o in data.orders] == [
+            (0, "3501512414_ORIGINS_99", "6332702261", "DHL", 99),
+            (2, "", "1ZFC2577", "", None),
+        ]
+        assert data.total_rows == 3
+        assert data.warnings == ["Riga 3: tracking vuoto, ignorata"]
+
+    def test_missing_columns_lists_all_columns(self):
+        """L'errore elenca tutte le colonne del file, non solo quelle caricate."""
+        csv = b"Tracking,Telefono,Note\n123,456,x\n"
+        with pytest.raises(ExcelParserError, match="Colonne trovate: Tracking, Telefono, Note"):
+            self.parser.parse_excel(csv, "orders.csv")
+
+    def test_no_recognized_columns_lists_all_columns(self):
+        """Nessuna colonna riconosciuta: errore sulle colonne, non di lettura."""
+        import pandas as pd
+        buffer = BytesIO()
+        pd.DataFrame({"Nome": ["Mario"], "Telefono": ["333"]}).to_excel(buffer, index=False)
+        with pytest.raises(ExcelParserError, match="Colonne trovate: Nome, Telefono"):
+            self.parser.parse_excel(buffer.getvalue(), "orders.xlsx")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+"""
+Test per il modulo matcher.
+"""
+
+import pytest
+import sys
+import os
+
+# Aggiungi il path del progetto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.excel_parser import OrderInfo, ExcelData
+from src.pdf_processor import PageInfo, PDFData
+from src.matcher import Matcher, MatchType, UnmatchedReason
+
+
+def _make_matcher(excel_trackings, pdf_trackings):
+    """Crea un Matcher da liste di tracking Excel e PDF."""
+    orders = [
+        OrderInfo(row_index=i, order_id=f"ORD_{i}", tracking=t, carrier="DHL")
+        for i, t in enumerate(excel_trackings)
+    ]
+    pages = [
+        PageInfo(page_number=i + 1, tracking=t, carrier="DHL", raw_text="")
+        for i, t in enumerate(pdf_trackings)
+    ]
+    excel_data = ExcelData(orders=orders, total_rows=len(orders), columns_found=[], warnings=[])
+    pdf_data = PDFData(pages=pages, total_pages=len(pages), pdf_bytes=b"")
+    return Matcher(pdf_data, excel_data)
+
+
+class TestMatcher:
+    """Test per la classe Matcher."""
+
+    def test_exact_match(self):
+        """Match esatto."""
+        report = _make_matcher(["4302825052"], ["4302825052"]).match_all()
+        assert report.matched[0].match_type == MatchType.EXACT
+        assert report.match_rate == 100.0
+
+    def test_leading_zeros_match(self):
+        """Match ignorando gli zeri iniziali."""
+        report = _make_matcher(["4302825052"], ["004302825052"]).match_all()
+        assert report.matched[0].match_type == MatchType.NORMALIZED
+
+    def test_partial_match(self):
+        """Match parziale con sovrapposizione >= 80%."""
+        report = _make_matcher(["302825052"], ["4302825052"]).match_all()
+        assert report.matched[0].match_type == MatchType.PARTIAL
+        assert report.matched[0].order.order_id == "ORD_0"
+
+    def test_fuzzy_match_prefers_fewer_differences(self):
+        """Il fuzzy match sceglie il tracking con meno differenze."""
+        report = _make_matcher(["123456789911", "123456789019"], ["123456789012"]).match_all()
+        result = report.matched[0]
+        assert result.match_type == MatchType.FUZZY
+        assert result.order.order_id == "ORD_1"
+
+    def test_unmatched_reasons(self):
+        """Tracking assente o non riconosciuto."""
+        report = _make_matcher(["4302825052"], ["999999999999999", None]).match_all()
+        reasons = [r.unmatched_reason for r in report.unmatched]
+        assert reasons == [UnmatchedReason.TRACKING_NOT_IN_EXCEL, UnmatchedReason.TRACKING_NOT_RECOGNIZED]
+
+    def test_length_buckets_cover_all_trackings(self):
+        """L'indice per lunghezza contiene tutti i tracking, nell'ordine originale."""
+        matcher = _make_matcher(["12345", "1234567890", "54321"], [])
+        assert matcher._candidates(5, 5) == [(t, o) for t, o in matcher._all_trackings if len(t) == 5]
+        assert matcher._candidates(1, 20) == matcher._all_trackings
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -122,5 +122,30 @@ class TestTrackingValidation:
         assert self.processor._validate_tracking("633270", "DHL") is False
 
 
+class TestProcessAndReorder:
+    """Test per estrazione e riordino su PDF reali."""
+
+    def _make_pdf(self, labels):
+        """Crea un PDF in memoria con una pagina per etichetta."""
+        import fitz
+        doc = fitz.open()
+        for label in labels:
+            doc.new_page().insert_text((72, 72), label)
+        data = doc.tobytes()
+        doc.close()
+        return data
+
+    def test_process_and_reorder(self):
+        """Estrazione e riordino delle pagine."""
+        processor = PDFProcessor()
+        pdf_bytes = self._make_pdf(["TRACKING #: 1Z FC2 577 68 0034 1731", "WAYBILL 43 0282 5052"])
+        pdf_data = processor.process_pdf(pdf_bytes)
+        assert pdf_data.total_pages == 2
+        assert pdf_data.pages[0].tracking == "1ZFC25776800341731"
+
+        reordered = processor.process_pdf(processor.reorder_pdf(pdf_bytes, [1, 0]))
+        assert [p.tracking for p in reordered.pages] == [pdf_data.pages[1].tracking, pdf_data.pages[0].tracking]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,101 @@
+import threading
+
+import pandas as pd
+
+from src.address_validator import AddressValidator
+from src.zip_validator import ZipValidator
+
+
+class StubAddressValidator(AddressValidator):
+    """Records Google API calls and answers with an ACCEPT verdict echoing the request."""
+
+    def __init__(self, fail_zips=()):
+        super().__init__(api_key="test-key")
+        self.calls = []
+        self.fail_zips = set(fail_zips)
+        self._lock = threading.Lock()
+
+    def validate_address(self, parsed, city, zip_code, state=""):
+        with self._lock:
+            self.calls.append((parsed.street_with_number, city, zip_code))
+        if zip_code in self.fail_zips:
+            raise RuntimeError("network down")
+        return {
+            "result": {
+                "verdict": {
+                    "possibleNextAction": "ACCEPT",
+                    "validationGranularity": "PREMISE",
+                    "addressComplete": True,
+                },
+                "address": {
+                    "addressComponents": [
+                        {"componentType": "route", "componentName": {"text": parsed.street_without_number},
+                         "confirmationLevel": "CONFIRMED"},
+                        {"componentType": "street_number", "componentName": {"text": parsed.house_number},
+                         "confirmationLevel": "CONFIRMED"},
+                        {"componentType": "postal_code", "componentName": {"text": zip_code},
+                         "confirmationLevel": "CONFIRMED"},
+                        {"componentType": "locality", "componentName": {"text": city},
+                         "confirmationLevel": "CONFIRMED"},
+                    ],
+                },
+            }
+        }
+
+
+def make_validator(stub):
+    validator = ZipValidator(google_api_key="test-key")
+    validator.address_validator = stub
+    return validator
+
+
+ROWS = pd.DataFrame({
+    "Street 1": ["Via Roma 10", "Via Roma 10", "Via Nazionale 5", "Hauptstrasse 1"],
+    "City": ["Milano", "Milano", "Roma", "Berlin"],
+    "Zip": ["20121", "20121", "00184", "10115"],
+    "Country": ["IT", "IT", "IT", "DE"],
+})
+
+
+def test_identical_rows_share_one_api_call():
+    stub = StubAddressValidator()
+    make_validator(stub).process_dataframe(ROWS.copy())
+
+    assert sorted(call[2] for call in stub.calls) == ["00184", "20121"]
+
+
+def test_every_row_gets_its_own_response():
+    stub = StubAddressValidator()
+    report, _ = make_validator(stub).process_dataframe(ROWS.copy())
+
+    assert [r.row_index for r in report.results] == [0, 1, 2, 3]
+    assert [r.suggested_zip for r in report.results[:3]] == ["20121", "20121", "00184"]
+    assert all(r.reason != "Google API unavailable" for r in report.results)
+
+
+def test_non_it_rows_make_no_call():
+    stub = StubAddressValidator()
+    report, _ = make_validator(stub).process_dataframe(ROWS.copy())
+
+    assert all(city != "Berlin" for _, city, _ in stub.calls)
+    assert report.results[3].country_code == "DE"
+    assert report.skipped_count == 1
+
+
+def test_failed_lookup_marks_only_its_rows_for_review():
+    stub = StubAddressValidator(fail_zips={"00184"})
+    report, _ = make_validator(stub).process_dataframe(ROWS.copy())
+
+    assert [r.reason == "Google API unavailable" for r in report.results] == [False, False, True, False]
+
+
+def test_progress_runs_from_20_to_100_during_validation():
+    stub = StubAddressValidator()
+    updates = []
+    make_validator(stub).process_dataframe(
+        ROWS.copy(), progress_callback=lambda current, total, message: updates.append(current)
+    )
+
+    assert updates[:2] == [0, 20]
+    assert updates[-1] == 100
+    assert updates == sorted(updates)